@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+class AccountsConfig(AppConfig):
+    name = 'accounts'
+
+    def ready(self):
+        from accounts.user_cache import invalidate_cached_user
+        User = self.get_model('User')
+        post_save.connect(invalidate_cached_user, sender=User)
+        post_delete.connect(invalidate_cached_user, sender=User)
@@ -1,38 +1,141 @@
+import hashlib
 import logging
+import threading
+import time
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache import cache
 
-import requests
+from accounts.user_cache import user_cache
 
 PERSONA_VERIFY_URL = 'https://verifier.login.persona.org/verify'
-User = get_user_model()
+# (connect, read) timeouts in seconds
+PERSONA_TIMEOUT = (3.05, 5)
+VERIFIED_ASSERTION_TTL = 60
 logger = logging.getLogger(__name__)
 
+class CircuitBreaker(object):
+    # after `failure_threshold` consecutive failures, fail fast for
+    # `reset_timeout` seconds, then let a single trial request through
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.reset()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+breaker = CircuitBreaker()
+_session = None
+# requests.RequestException, set along with the session
+_request_error = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session, _request_error
+    with _session_lock:
+        if _session is None:
+            # requests is only imported once we first talk to the verifier,
+            # which keeps it off the worker boot path
+            import requests
+            from requests.adapters import HTTPAdapter
+            from requests.packages.urllib3.util.retry import Retry
+            # keep-alive connections, retrying only failed connects
+            adapter = HTTPAdapter(
+                pool_maxsize=10, max_retries=Retry(total=1, connect=1, read=0)
+            )
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _request_error = requests.RequestException
+        return _session
+
+def _assertion_cache_key(assertion):
+    return 'persona-assertion:' + hashlib.sha1(assertion.encode()).hexdigest()
+
 class PersonaAuthenticationBackend(object):
 
     def authenticate(self, assertion):
-        resp = requests.post(PERSONA_VERIFY_URL, data={
-            'assertion': assertion,
-            'audience': settings.DOMAIN
-        })
-
-        if resp.ok and resp.json()['status'] == 'okay':
-            email = resp.json()['email']
-            try:
-                return User.objects.get(email=email)
-            except User.DoesNotExist:
-                return User.objects.create(email=email)
-        elif not resp.ok:
+        email = self.verify(assertion)
+        if email is None:
+            return None
+        # get_or_create copes with a concurrent first login creating the
+        # same user between the get and the create
+        user, _ = get_user_model().objects.get_or_create(email=email)
+        return user
+
+    def verify(self, assertion):
+        cache_key = _assertion_cache_key(assertion)
+        email = cache.get(cache_key)
+        if email is not None:
+            return email
+
+        if not breaker.allow():
+            logger.warning('Persona verifier is failing, not asking it')
+            return None
+        session = get_session()
+        try:
+            resp = session.post(
+                getattr(settings, 'PERSONA_VERIFY_URL', PERSONA_VERIFY_URL),
+                data={'assertion': assertion, 'audience': settings.DOMAIN},
+                timeout=getattr(settings, 'PERSONA_TIMEOUT', PERSONA_TIMEOUT)
+            )
+        except _request_error as e:
+            breaker.record_failure()
+            logger.warning('Persona verify request failed: {}'.format(e))
+            return None
+
+        if not resp.ok:
+            breaker.record_failure()
             logger.warning('Persona says no. resp.ok is False')
-        else:
-            logger.warning('Persona says no. Json was: {}'.format(
-                resp.json()
-            ))
+            return None
+        try:
+            data = resp.json()
+            email = data['email'] if data['status'] == 'okay' else None
+        except (ValueError, KeyError, TypeError):
+            # a verifier that answers 200 with nonsense is failing too
+            breaker.record_failure()
+            logger.warning('Persona sent a malformed reply: {!r}'.format(resp.text[:200]))
+            return None
+        breaker.record_success()
+
+        if email is not None:
+            cache.set(cache_key, email, VERIFIED_ASSERTION_TTL)
+            return email
+        logger.warning('Persona says no. Json was: {}'.format(data))
 
 
     def get_user(self, email):
+        user = user_cache.get(email)
+        if user is not None:
+            return user
+        User = get_user_model()
         try:
-            return User.objects.get(email=email)
+            user = User.objects.get(email=email)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
+        user_cache.set(user)
+        return user
@@ -0,0 +1,52 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from superlists.bench import (
+    summarize, throwaway_caches, throwaway_database, time_calls, write_report,
+)
+
+SESSION_MODES = ('db', 'cached_db', 'signed_cookies')
+
+class Command(BaseCommand):
+    help = 'Compares per-request session overhead across the session modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        with throwaway_database(), throwaway_caches():
+            user = get_user_model().objects.create(email='bench@example.com')
+            for mode in SESSION_MODES:
+                engine = 'django.contrib.sessions.backends.' + mode
+                with override_settings(SESSION_ENGINE=engine):
+                    results.update(self.bench_mode(mode, user, options['requests']))
+        write_report(self.stdout, results, options['json'])
+
+    def bench_mode(self, mode, user, requests):
+        SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        sessions = []
+
+        def log_in():
+            session = SessionStore()
+            session[SESSION_KEY] = user.pk
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session.save()
+            sessions.append(session.session_key)
+
+        login_timings = time_calls(log_in, requests)
+
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = sessions[0]
+        client.get('/')  # warm up
+        request_timings = time_calls(lambda: client.get('/'), requests)
+        return {
+            mode + ' login': summarize(login_timings),
+            mode + ' request': summarize(request_timings),
+        }
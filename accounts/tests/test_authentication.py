@@ -1,19 +1,31 @@
+import json
 import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 from unittest.mock import patch
+from urllib.parse import parse_qs
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.contrib.auth import get_user_model
 
 from accounts.authentication import (
-    PERSONA_VERIFY_URL, PersonaAuthenticationBackend
+    PERSONA_TIMEOUT, PERSONA_VERIFY_URL,
+    CircuitBreaker, PersonaAuthenticationBackend, breaker
 )
+from accounts.user_cache import user_cache
 
 User = get_user_model()
 
-@patch('accounts.authentication.requests.post')
+@patch('requests.Session.post')
 class AuthenticateTest(TestCase):
 
     def setUp(self):
+        cache.clear()
+        breaker.reset()
         self.backend = PersonaAuthenticationBackend()
         user = User(email='other@user.com')
         user.username = 'otheruser'
@@ -23,7 +35,8 @@ class AuthenticateTest(TestCase):
         self.backend.authenticate('an assertion')
         mock_post.assert_called_once_with(
             PERSONA_VERIFY_URL,
-            data={'assertion': 'an assertion', 'audience': settings.DOMAIN}
+            data={'assertion': 'an assertion', 'audience': settings.DOMAIN},
+            timeout=PERSONA_TIMEOUT
         )
 
     def test_returns_none_if_response_errors(self, mock_post):
@@ -84,8 +97,141 @@ class AuthenticateTest(TestCase):
             'Persona says no. Json was: {}'.format(response_json)
         )
 
+    def test_returns_none_for_a_reply_that_is_not_json(self, mock_post):
+        mock_post.return_value.json.side_effect = ValueError('no JSON')
+        mock_post.return_value.text = '<html>'
+        self.assertIsNone(self.backend.authenticate('an assertion'))
+        self.assertEqual(breaker.failures, 1)
+
+    def test_returns_none_for_a_reply_without_status(self, mock_post):
+        mock_post.return_value.json.return_value = {'email': 'a@b.com'}
+        mock_post.return_value.text = '{"email": "a@b.com"}'
+        self.assertIsNone(self.backend.authenticate('an assertion'))
+        self.assertEqual(breaker.failures, 1)
+        self.assertFalse(User.objects.filter(email='a@b.com').exists())
+
+    def test_caches_verified_assertions(self, mock_post):
+        mock_post.return_value.json.return_value = {
+            'status': 'okay',
+            'email': 'a@b.com'
+        }
+        self.backend.authenticate('an assertion')
+        found_user = self.backend.authenticate('an assertion')
+        self.assertEqual(found_user, User.objects.get(email='a@b.com'))
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_does_not_cache_rejected_assertions(self, mock_post):
+        mock_post.return_value.json.return_value = {'status': 'not okay!'}
+        self.backend.authenticate('an assertion')
+        self.backend.authenticate('an assertion')
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_stops_asking_verifier_once_breaker_opens(self, mock_post):
+        mock_post.return_value.ok = False
+        for i in range(breaker.failure_threshold + 2):
+            self.backend.authenticate('assertion %d' % (i,))
+        self.assertEqual(mock_post.call_count, breaker.failure_threshold)
+
+class CircuitBreakerTest(TestCase):
+
+    def test_opens_after_threshold_failures(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        circuit.record_failure()
+        self.assertTrue(circuit.allow())
+        circuit.record_failure()
+        self.assertFalse(circuit.allow())
+
+    def test_success_resets_failure_count(self):
+        circuit = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        circuit.record_failure()
+        circuit.record_success()
+        circuit.record_failure()
+        self.assertTrue(circuit.allow())
+
+    def test_lets_one_trial_through_after_reset_timeout(self):
+        circuit = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        circuit.record_failure()
+        self.assertFalse(circuit.allow())
+        time.sleep(0.02)
+        self.assertTrue(circuit.allow())
+        self.assertFalse(circuit.allow())
+
+class StubVerifier(BaseHTTPRequestHandler):
+    # answers like the Persona verifier: 'slow' assertions are answered
+    # late, 'broken' ones with a 500, anything else as a@b.com
+
+    requests = 0
+
+    def do_POST(self):
+        StubVerifier.requests += 1
+        length = int(self.headers['Content-Length'])
+        assertion = parse_qs(self.rfile.read(length).decode())['assertion'][0]
+        if assertion == 'slow':
+            time.sleep(0.5)
+        if assertion == 'broken':
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({'status': 'okay', 'email': 'a@b.com'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class StubVerifierServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class StubVerifierTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubVerifierServer(('127.0.0.1', 0), StubVerifier)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings = override_settings(
+            PERSONA_VERIFY_URL='http://127.0.0.1:%d/verify' % (cls.server.server_port,),
+            PERSONA_TIMEOUT=(1, 0.2),
+        )
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        breaker.reset()
+        StubVerifier.requests = 0
+        self.backend = PersonaAuthenticationBackend()
+
+    def test_verifies_against_stub(self):
+        user = self.backend.authenticate('good')
+        self.assertEqual(user, User.objects.get(email='a@b.com'))
+
+    def test_slow_verifier_times_out(self):
+        start = time.monotonic()
+        self.assertIsNone(self.backend.authenticate('slow'))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(breaker.failures, 1)
+
+    def test_broken_verifier_opens_breaker(self):
+        for i in range(breaker.failure_threshold + 3):
+            self.assertIsNone(self.backend.authenticate('broken'))
+        self.assertEqual(StubVerifier.requests, breaker.failure_threshold)
+
 class GetUserTest(TestCase):
 
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
     def test_gets_user_by_email(self):
         backend = PersonaAuthenticationBackend()
         other_user = User(email='other@user.com')
@@ -99,4 +245,28 @@ class GetUserTest(TestCase):
         backend = PersonaAuthenticationBackend()
         self.assertIsNone(
             backend.get_user('a@b.com')
-        )
\ No newline at end of file
+        )
+
+    def test_second_lookup_comes_from_cache(self):
+        backend = PersonaAuthenticationBackend()
+        desired_user = User.objects.create(email='a@b.com')
+        backend.get_user('a@b.com')
+        with self.assertNumQueries(0):
+            found_user = backend.get_user('a@b.com')
+        self.assertEqual(found_user, desired_user)
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+    def test_saving_user_invalidates_cached_copy(self):
+        backend = PersonaAuthenticationBackend()
+        user = User.objects.create(email='a@b.com')
+        backend.get_user('a@b.com')
+        user.last_login = user.last_login.replace(year=2000)
+        user.save()
+        self.assertEqual(backend.get_user('a@b.com').last_login.year, 2000)
+
+    def test_deleted_user_is_not_returned(self):
+        backend = PersonaAuthenticationBackend()
+        user = User.objects.create(email='a@b.com')
+        backend.get_user('a@b.com')
+        user.delete()
+        self.assertIsNone(backend.get_user('a@b.com'))
\ No newline at end of file
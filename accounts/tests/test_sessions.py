@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from functional_tests.management.commands.create_session import (
+    create_pre_authenticated_session
+)
+
+class SessionModesTest(TestCase):
+
+    def assert_session_logs_in(self, engine):
+        with override_settings(SESSION_ENGINE=engine):
+            session_key = create_pre_authenticated_session('a@b.com')
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            response = self.client.get('/')
+        self.assertContains(response, 'Logged in as a@b.com')
+
+    def test_db_sessions(self):
+        self.assert_session_logs_in('django.contrib.sessions.backends.db')
+
+    def test_cached_db_sessions(self):
+        self.assert_session_logs_in('django.contrib.sessions.backends.cached_db')
+
+    def test_signed_cookie_sessions(self):
+        self.assert_session_logs_in(
+            'django.contrib.sessions.backends.signed_cookies'
+        )
@@ -0,0 +1,63 @@
+from unittest.mock import patch
+from django.core.cache import caches
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from accounts.user_cache import UserCache
+
+User = get_user_model()
+
+class UserCacheTest(TestCase):
+
+    def test_returns_none_and_counts_miss_for_unknown_email(self):
+        cache = UserCache()
+        self.assertIsNone(cache.get('a@b.com'))
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1, 'size': 0})
+
+    def test_returns_copy_of_cached_user(self):
+        cache = UserCache()
+        user = User(email='a@b.com')
+        cache.set(user)
+        found = cache.get('a@b.com')
+        self.assertEqual(found, user)
+        self.assertIsNot(found, user)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = UserCache(maxsize=2)
+        for email in ('a@b.com', 'c@d.com'):
+            cache.set(User(email=email))
+        cache.get('a@b.com')
+        cache.set(User(email='e@f.com'))
+        self.assertIsNone(cache.get('c@d.com'))
+        self.assertIsNotNone(cache.get('a@b.com'))
+
+    def test_expires_entries_after_ttl(self):
+        cache = UserCache(ttl=10)
+        with patch('accounts.user_cache.time.monotonic', return_value=0):
+            cache.set(User(email='a@b.com'))
+        with patch('accounts.user_cache.time.monotonic', return_value=11):
+            self.assertIsNone(cache.get('a@b.com'))
+
+    def test_invalidate_removes_entry(self):
+        cache = UserCache()
+        cache.set(User(email='a@b.com'))
+        cache.invalidate('a@b.com')
+        self.assertIsNone(cache.get('a@b.com'))
+
+    def test_falls_back_to_django_cache(self):
+        caches['default'].clear()
+        User(email='a@b.com').save()
+        writer = UserCache(cache_alias='default')
+        writer.set(User.objects.get(email='a@b.com'))
+        reader = UserCache(cache_alias='default')
+        self.assertEqual(reader.get('a@b.com').email, 'a@b.com')
+        writer.invalidate('a@b.com')
+        self.assertIsNone(reader.get('a@b.com'))
+
+    def test_shared_entries_are_not_kept_per_process(self):
+        caches['default'].clear()
+        cache = UserCache(cache_alias='default')
+        cache.set(User(email='a@b.com'))
+        caches['default'].clear()
+        self.assertIsNone(cache.get('a@b.com'))
@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+class UserCache(object):
+    # users by email with a TTL: in one of the Django caches when
+    # `cache_alias` is given, so that processes share entries and
+    # invalidations, otherwise in a bounded per-process LRU. There is no
+    # per-process layer in front of the shared cache, since other processes
+    # couldn't invalidate it
+
+    def __init__(self, maxsize=1024, ttl=300, cache_alias=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _backend_key(self, email):
+        return 'user:' + email
+
+    def _remember(self, user):
+        self.users[user.email] = (user, time.monotonic() + self.ttl)
+        self.users.move_to_end(user.email)
+        while len(self.users) > self.maxsize:
+            self.users.popitem(last=False)
+
+    def get(self, email):
+        if self.cache_alias is not None:
+            user = caches[self.cache_alias].get(self._backend_key(email))
+            with self.lock:
+                if user is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+            return user
+
+        with self.lock:
+            entry = self.users.get(email)
+            if entry is not None:
+                user, expires = entry
+                if expires > time.monotonic():
+                    self.users.move_to_end(email)
+                    self.hits += 1
+                    # callers may set attributes on the user they're given
+                    return copy.copy(user)
+                del self.users[email]
+            self.misses += 1
+            return None
+
+    def set(self, user):
+        if self.cache_alias is not None:
+            caches[self.cache_alias].set(
+                self._backend_key(user.email), user, self.ttl
+            )
+            return
+        with self.lock:
+            self._remember(copy.copy(user))
+
+    def invalidate(self, email):
+        if self.cache_alias is not None:
+            caches[self.cache_alias].delete(self._backend_key(email))
+            return
+        with self.lock:
+            self.users.pop(email, None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.users),
+            }
+
+user_cache = UserCache(cache_alias=getattr(settings, 'USER_CACHE_ALIAS', None))
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.email)
@@ -25,10 +25,12 @@ def deploy(production=False):
         _update_settings(source_folder, env.host)
         _update_virtualenv(source_folder)
         _update_static_files(source_folder)
+        _check_templates(source_folder)
         _update_database(source_folder)
+        _update_gunicorn_config(source_folder, env.host)
 
 def _create_directory_structure_if_necessary(site_folder):
-    for subfolder in ('database', 'static', 'virtualenv', 'source'):
+    for subfolder in ('database', 'static', 'virtualenv', 'source', 'cache'):
         run('mkdir -p %s/%s' % (site_folder, subfolder))
 
 def _get_latest_source(source_folder):
@@ -62,5 +64,13 @@ def _update_virtualenv(source_folder):
 def _update_static_files(source_folder):
     run('cd %s && ../virtualenv/bin/python3 manage.py collectstatic --noinput' % (source_folder,))
 
+def _check_templates(source_folder):
+    run('cd %s && ../virtualenv/bin/python3 manage.py compile_templates' % (source_folder,))
+
 def _update_database(source_folder):
     run('cd %s && ../virtualenv/bin/python3 manage.py migrate --noinput' % (source_folder,))
+
+def _update_gunicorn_config(source_folder, site_name):
+    config_path = source_folder + '/../gunicorn.conf.py'
+    run('cp %s/deploy_tools/gunicorn-config.template.py %s' % (source_folder, config_path))
+    sed(config_path, 'SITENAME', site_name)
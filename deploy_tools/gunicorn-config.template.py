@@ -0,0 +1,23 @@
+# fab deploy renders this to ../gunicorn.conf.py, replacing SITENAME;
+# the upstart job starts gunicorn with --config pointing at it
+import multiprocessing
+import os
+
+bind = 'unix:/tmp/SITENAME.socket'
+accesslog = '../access.log'
+errorlog = '../error.log'
+
+# threaded workers, so a request waiting on the Persona verifier or the
+# database holds up one thread rather than a whole worker process (the
+# 'gthread' shorthand only exists from gunicorn 19.4)
+worker_class = 'gunicorn.workers.gthread.ThreadWorker'
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS', 2 * multiprocessing.cpu_count() + 1
+))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 30
+
+# load the app once in the master and fork workers from it; nothing opens
+# a database connection, cache file or HTTP session at import, so each
+# worker still gets its own
+preload_app = True
@@ -92,6 +92,10 @@ class FunctionalTest(StaticLiveServerTestCase):
         rows = table.find_elements_by_tag_name('tr')
         self.assertIn(row_text, [row.text for row in rows])
 
+    def wait_for_row_in_list_table(self, row_text):
+        # for rows added without a page load
+        self.wait_for(lambda: self.check_for_row_in_list_table(row_text))
+
     def get_item_input_box(self):
         return self.browser.find_element_by_id('id_text')
 
@@ -26,7 +26,8 @@ def reset_database():
 def create_session_on_server(email):
     with shell_env(SUPERLISTS_DB=environ['STAGING_DB'],
                    SUPERLISTS_DB_USERNAME=environ['STAGING_DB_USERNAME'],
-                   SUPERLISTS_DB_PASSWORD=environ['STAGING_DB_PASSWORD']):
+                   SUPERLISTS_DB_PASSWORD=environ['STAGING_DB_PASSWORD'],
+                   SUPERLISTS_FUNCTIONAL_TESTS='1'):
         session_key = run('{manage_py} create_session {email}'.format(
             manage_py=_get_manage_dot_py(env.host),
             email=email,
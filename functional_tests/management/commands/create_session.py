@@ -1,11 +1,14 @@
+from importlib import import_module
+
 from django.conf import settings
 from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY, get_user_model
-User = get_user_model()
-from django.contrib.sessions.backends.db import SessionStore
 from django.core.management.base import BaseCommand
 
 def create_pre_authenticated_session(email):
-    user = User.objects.create(email=email)
+    user = get_user_model().objects.create(email=email)
+    # whichever backend SESSION_MODE picked; for signed cookies the
+    # session key is the cookie value itself
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
     session = SessionStore()
     session[SESSION_KEY] = user.pk
     session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
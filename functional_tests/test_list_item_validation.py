@@ -6,7 +6,10 @@ from time import sleep
 
 class ItemValidationTest(FunctionalTest):
     def get_error_element(self):
-        return self.browser.find_element_by_css_selector('.has-error')
+        # errors on list pages arrive by XHR, after the keypress returns
+        return self.wait_for(
+            lambda: self.browser.find_element_by_css_selector('.has-error')
+        )
 
     def test_cannot_add_empty_list_items(self):
         # Edith goes to the home page and accidentally tries to submit
@@ -33,8 +36,8 @@ class ItemValidationTest(FunctionalTest):
 
         # And she can correct it by filling some text in
         self.get_item_input_box().send_keys('Make tea\n')
+        self.wait_for_row_in_list_table('2: Make tea')
         self.check_for_row_in_list_table('1: Buy milk')
-        self.check_for_row_in_list_table('2: Make tea')
 
     def test_cannot_add_duplicate_items(self):
         # Edith goes to the home page and starts a new list
@@ -19,6 +19,7 @@ class MyListsTest(FunctionalTest):
         self.browser.get(self.server_url)
         self.get_item_input_box().send_keys("Reticulate splines\n")
         self.get_item_input_box().send_keys("Immanentize eschaton\n")
+        self.wait_for_row_in_list_table('2: Immanentize eschaton')
         first_list_url = self.browser.current_url
 
         # She notices a "My lists" link, for the first time.
@@ -0,0 +1,134 @@
+import itertools
+import random
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from lists.models import BULK_BATCH_SIZE, Item, List, batches
+
+VOCABULARY = (
+    'buy', 'milk', 'eggs', 'bread', 'call', 'mum', 'fix', 'the', 'bike',
+    'book', 'flights', 'pay', 'rent', 'water', 'plants', 'read', 'chapter',
+    'write', 'report', 'clean', 'kitchen', 'walk', 'dog', 'email', 'bank',
+    'renew', 'passport', 'pick', 'up', 'parcel', 'cancel', 'gym', 'order',
+    'peacock', 'feathers', 'fishing', 'flies', 'tidy', 'garage', 'plan',
+)
+
+DatasetCounts = namedtuple('DatasetCounts', ['users', 'lists', 'items', 'shares'])
+
+def user_email(prefix, index):
+    return '%s%d@example.com' % (prefix, index)
+
+def items_per_list(rng, mean, maximum):
+    # exponential, so most lists are short and a few are very long
+    if mean <= 1:
+        return 1
+    return min(maximum, 1 + int(rng.expovariate(1 / (mean - 1))))
+
+def item_text(rng, position):
+    words = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 5)))
+    # the position keeps texts unique within their list
+    return '%s %d' % (words, position)
+
+def insert(model, objects, batch_size):
+    # bulk_create from a generator without holding more than one batch
+    objects = iter(objects)
+    count = 0
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            return count
+        model.objects.bulk_create(batch)
+        count += len(batch)
+
+def sharees(rng, users, owner, mean):
+    if mean <= 0 or users < 2:
+        return []
+    fan_out = min(users - 1, int(rng.expovariate(1 / mean)))
+    picked = rng.sample(range(users), min(fan_out + 1, users))
+    return [user for user in picked if user != owner][:fan_out]
+
+def create_users(count, prefix, batch_size):
+    User = get_user_model()
+    created = 0
+    for emails in batches(range(count), batch_size):
+        emails = [user_email(prefix, index) for index in emails]
+        existing = set(
+            User.objects.filter(email__in=emails).values_list('email', flat=True)
+        )
+        created += insert(
+            User, (User(email=email) for email in emails if email not in existing),
+            batch_size
+        )
+    return created
+
+def generate(users=1000, lists=10000, items_mean=10, items_max=1000,
+             shares_mean=1.0, anonymous_ratio=0.2, seed=0, prefix='seed',
+             batch_size=BULK_BATCH_SIZE):
+    # the same arguments always produce the same lists, items and shares;
+    # lists are created a batch at a time, with their items and shares
+    # streamed into batched inserts, so memory doesn't grow with the dataset
+    rng = random.Random(seed)
+    User = get_user_model()
+    Share = List.shared_with.through
+    counts = DatasetCounts(create_users(users, prefix, batch_size), 0, 0, 0)
+
+    for chunk in batches(range(lists), batch_size):
+        plans = []
+        for _ in chunk:
+            owner = None
+            if users and rng.random() >= anonymous_ratio:
+                owner = rng.randrange(users)
+            plans.append((owner, items_per_list(rng, items_mean, items_max)))
+
+        with transaction.atomic():
+            created = List.create_many(
+                (item_text(rng, 1),
+                 None if owner is None else User(email=user_email(prefix, owner)))
+                for owner, _ in plans
+            )
+            items = insert(Item, (
+                Item.build(list_, item_text(rng, position))
+                for list_, (_, count) in zip(created, plans)
+                for position in range(2, count + 1)
+            ), batch_size)
+            shares = insert(Share, (
+                Share(list_id=list_.id, user_id=user_email(prefix, sharee))
+                for list_, (owner, _) in zip(created, plans)
+                if owner is not None
+                for sharee in sharees(rng, users, owner, shares_mean)
+            ), batch_size)
+
+        counts = DatasetCounts(
+            counts.users,
+            counts.lists + len(created),
+            counts.items + len(created) + items,
+            counts.shares + shares,
+        )
+    return counts
+
+def add_dataset_arguments(parser, users=1000, lists=10000, items_mean=10,
+                          items_max=1000, shares_mean=1.0, anonymous_ratio=0.2):
+    parser.add_argument('--users', type=int, default=users)
+    parser.add_argument('--lists', type=int, default=lists)
+    parser.add_argument('--items-mean', type=float, default=items_mean,
+                        help='mean items per list, exponentially distributed')
+    parser.add_argument('--items-max', type=int, default=items_max,
+                        help='most items in any one list')
+    parser.add_argument('--shares-mean', type=float, default=shares_mean,
+                        help='mean sharees per owned list')
+    parser.add_argument('--anonymous-ratio', type=float, default=anonymous_ratio,
+                        help='fraction of lists with no owner')
+    parser.add_argument('--seed', type=int, default=0)
+
+def dataset_options(options):
+    return {
+        'users': options['users'],
+        'lists': options['lists'],
+        'items_mean': options['items_mean'],
+        'items_max': options['items_max'],
+        'shares_mean': options['shares_mean'],
+        'anonymous_ratio': options['anonymous_ratio'],
+        'seed': options['seed'],
+    }
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import TextInput
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from lists.models import Item, List
 
 EMPTY_LIST_ERROR = "You can't have an empty list item"
@@ -34,13 +35,31 @@ class ExistingListItemForm(ItemForm):
         super().__init__(*args, **kwargs)
         self.instance.list = for_list
 
+    def _is_duplicate(self):
+        # only the same text is a duplicate, not a clash of digests
+        return self.instance.list.item_set.filter(
+            text_digest=Item.digest(self.instance.text), text=self.instance.text
+        ).exists()
+
     def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            e.error_dict = {'text': [DUPLICATE_ITEM_ERROR]}
-            self._update_errors(e)
+        if 'text' not in self._errors and self._is_duplicate():
+            self._update_errors(
+                ValidationError({'text': [DUPLICATE_ITEM_ERROR]})
+            )
 
     def save(self):
-        return forms.models.ModelForm.save(self)
-
+        # returns None, with the error added to the form, for a duplicate
+        # added since validation; the ('list', 'text_digest') constraint
+        # catches those
+        if self.errors:
+            raise ValueError("The item could not be saved because it didn't validate.")
+        try:
+            with transaction.atomic():
+                self.instance.save(force_insert=True)
+        except IntegrityError:
+            if not self._is_duplicate():
+                raise
+            self.instance.pk = None
+            self.add_error('text', DUPLICATE_ITEM_ERROR)
+            return None
+        return self.instance
@@ -0,0 +1,78 @@
+import itertools
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from lists.dataset import add_dataset_arguments, dataset_options, generate
+from lists.models import List
+from superlists.bench import (
+    logged_in_client, profile_calls, throwaway_caches, throwaway_database,
+    write_report,
+)
+
+class Command(BaseCommand):
+    help = 'Seeds a throwaway database and times every lists view against it'
+
+    def add_arguments(self, parser):
+        add_dataset_arguments(
+            parser, users=20, lists=100, items_mean=20, shares_mean=2,
+            anonymous_ratio=0.1
+        )
+        parser.add_argument('--requests', type=int, default=200,
+                            help='requests per view')
+        parser.add_argument('--json', action='store_true')
+        parser.add_argument('--output', help='also write the JSON report here')
+
+    def handle(self, *args, **options):
+        with throwaway_database(), throwaway_caches():
+            users, lists = self.seed(options)
+            results = self.bench_views(users, lists, options['requests'])
+        write_report(self.stdout, results, options['json'])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+    def seed(self, options):
+        generate(prefix='bench', **dataset_options(options))
+        users = list(get_user_model().objects.order_by('email'))
+        lists = list(List.objects.order_by('id'))
+        return users, lists
+
+    def bench_views(self, users, lists, requests):
+        anonymous = Client()
+        owner = next(
+            user for user in users
+            if any(list_.owner_id == user.pk for list_ in lists)
+        )
+        client = logged_in_client(owner)
+        owned = itertools.cycle([list_ for list_ in lists if list_.owner_id == owner.pk])
+        viewed = itertools.cycle(lists)
+        emails = itertools.cycle(user.email for user in users)
+        sharees = itertools.cycle(user.email for user in users[1:] or users)
+        texts = ('bench item %d' % (i,) for i in itertools.count())
+
+        views = {
+            'home_page': lambda: anonymous.get('/'),
+            'new_list': lambda: client.post(
+                '/lists/new', data={'text': next(texts)}
+            ),
+            'view_list': lambda: client.get('/lists/%d/' % (next(viewed).id,)),
+            'add_item': lambda: client.post(
+                '/lists/%d/items' % (next(owned).id,),
+                data={'text': next(texts)}
+            ),
+            'my_lists': lambda: client.get('/lists/users/%s/' % (next(emails),)),
+            'share_list': lambda: client.post(
+                '/lists/%d/share' % (next(owned).id,),
+                data={'email': next(sharees)}
+            ),
+        }
+        results = {}
+        for name, view in sorted(views.items()):
+            response = view()  # warm up
+            if response.status_code >= 400:
+                raise AssertionError('%s answered %d' % (name, response.status_code))
+            results[name] = profile_calls(view, requests)
+        return results
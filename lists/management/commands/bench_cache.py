@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from superlists.bench import summarize, time_calls, write_report
+from superlists.cache import MmapCache
+
+class Command(BaseCommand):
+    help = 'Compares get/set latency of MmapCache against LocMemCache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=10000)
+        parser.add_argument('--value-size', type=int, default=2048)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                'locmem': LocMemCache('bench', {'OPTIONS': {'MAX_ENTRIES': 100000}}),
+                'mmap': MmapCache(os.path.join(directory, 'bench.cache'), {}),
+            }
+            for name, cache in sorted(backends.items()):
+                results.update(self.bench_backend(name, cache, options))
+        write_report(self.stdout, results, options['json'])
+
+    def bench_backend(self, name, cache, options):
+        value = 'x' * options['value_size']
+        keys = iter(range(options['operations'] * 3))
+
+        set_timings = time_calls(
+            lambda: cache.set('key-%d' % (next(keys) % 1000,), value),
+            options['operations']
+        )
+        hit_timings = time_calls(
+            lambda: cache.get('key-%d' % (next(keys) % 1000,)),
+            options['operations']
+        )
+        miss_timings = time_calls(
+            lambda: cache.get('missing-%d' % (next(keys),)),
+            options['operations']
+        )
+        return {
+            name + ' set': summarize(set_timings),
+            name + ' get hit': summarize(hit_timings),
+            name + ' get miss': summarize(miss_timings),
+        }
@@ -0,0 +1,58 @@
+import logging
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from superlists.bench import summarize, time_calls, write_report
+from superlists.log import QueuedHandler
+
+class Command(BaseCommand):
+    help = 'Compares the cost of a log call with direct and queued handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=20000)
+        parser.add_argument('--maxsize', type=int, default=10000,
+                            help='queue size for the queued handler')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in ('direct', 'queued'):
+                results[mode] = self.bench_mode(mode, directory, options)
+        write_report(self.stdout, results, options['json'])
+
+    def bench_mode(self, mode, directory, options):
+        # the settings' pair of handlers: a file, and a stream standing in
+        # for the console
+        devnull = open(os.devnull, 'w')
+        targets = [
+            logging.FileHandler(os.path.join(directory, mode + '.log')),
+            logging.StreamHandler(devnull),
+        ]
+        if mode == 'queued':
+            handlers = [QueuedHandler(targets, maxsize=options['maxsize'])]
+        else:
+            handlers = targets
+        logger = logging.getLogger('bench_logging.' + mode)
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        for handler in handlers:
+            logger.addHandler(handler)
+
+        try:
+            timings = time_calls(
+                lambda: logger.info('view=%s status=%d queries=%d', 'view_list', 200, 4),
+                options['records']
+            )
+        finally:
+            for handler in handlers:
+                logger.removeHandler(handler)
+                handler.close()
+            for target in targets:
+                target.close()
+            devnull.close()
+        result = summarize(timings)
+        result['dropped'] = getattr(handlers[0], 'dropped', 0)
+        return result
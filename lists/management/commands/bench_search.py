@@ -0,0 +1,75 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from lists.dataset import add_dataset_arguments, dataset_options, generate
+from lists.models import Item, ItemToken, List, search_items
+from superlists.bench import profile_calls, throwaway_database, write_report
+
+QUERIES = {
+    'one word': 'milk',
+    'two words': 'buy milk',
+    'rare word': '500',
+}
+
+class Command(BaseCommand):
+    help = 'Seeds a throwaway database with millions of items and times ' \
+           'searches against it, with a text__icontains scan for comparison'
+
+    def add_arguments(self, parser):
+        add_dataset_arguments(
+            parser, users=1000, lists=200000, items_mean=10, shares_mean=2
+        )
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='searches per query')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            start = time.perf_counter()
+            counts = generate(prefix='bench', **dataset_options(options))
+            elapsed = time.perf_counter() - start
+            results = {'seed': {
+                'items': counts.items,
+                'seconds': round(elapsed, 1),
+                'items_per_s': round(counts.items / elapsed),
+            }}
+            if connection.vendor != 'postgresql':
+                # as update_search_index would, before anything can be found
+                start = time.perf_counter()
+                ItemToken.catch_up()
+                results['index'] = {'seconds': round(time.perf_counter() - start, 1)}
+            results.update(self.bench_searches(self.busiest_user(), options['repeat']))
+        write_report(self.stdout, results, options['json'])
+
+    def busiest_user(self):
+        # the owner of the most lists, who has the most items to search
+        busiest = List.objects.exclude(owner=None).values('owner').annotate(
+            lists=Count('id')
+        ).order_by('-lists').first()
+        return get_user_model().objects.get(pk=busiest['owner'])
+
+    def scan(self, visible, query):
+        # what searching would be without an index
+        items = Item.objects.filter(list__in=visible)
+        for word in query.split():
+            items = items.filter(text__icontains=word)
+        return items.order_by('-id')
+
+    def bench_searches(self, user, repeat):
+        visible = List.objects.visible_to(user).values('id')
+        results = {}
+        for name, query in sorted(QUERIES.items()):
+            searches = {
+                'search %s' % (name,): lambda: search_items(user, query)[0],
+                'search %s page 5' % (name,): lambda: search_items(user, query, page=5)[0],
+                'scan %s' % (name,): lambda: list(self.scan(visible, query)[:20]),
+            }
+            for label, search in searches.items():
+                search()  # warm up
+                results[label] = profile_calls(search, repeat)
+                results[label]['results'] = len(search())
+        return results
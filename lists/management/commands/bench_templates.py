@@ -0,0 +1,76 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template, render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from lists.dataset import generate
+from lists.forms import ExistingListItemForm, ItemForm
+from lists.models import List
+from superlists.bench import summarize, throwaway_database, time_calls, write_report
+from superlists.warmup import compile_templates, project_templates
+
+APP_DIRECTORIES_LOADER = 'django.template.loaders.app_directories.Loader'
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+def templates_setting(cached):
+    loaders = [APP_DIRECTORIES_LOADER]
+    if cached:
+        loaders = [(CACHED_LOADER, loaders)]
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for template in templates:
+        template.pop('APP_DIRS', None)
+        template['OPTIONS']['loaders'] = loaders
+    return templates
+
+class Command(BaseCommand):
+    help = 'Compares template loading and rendering with and without the cached loader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=500)
+        parser.add_argument('--items', type=int, default=50,
+                            help='items in the rendered list')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        results = {}
+        # a dummy cache, so the list page's fragments are rendered every time
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with throwaway_database(), override_settings(CACHES=caches):
+            generate(users=1, lists=1, items_mean=options['items'],
+                     items_max=options['items'], prefix='bench')
+            list_ = List.objects.get()
+            for mode, cached in (('uncached', False), ('cached', True)):
+                with override_settings(TEMPLATES=templates_setting(cached)):
+                    results.update(self.bench_mode(mode, list_, options['repeat']))
+        write_report(self.stdout, results, options['json'])
+
+    def bench_mode(self, mode, list_, repeat):
+        # what a worker does at boot
+        compile_templates()
+        names = project_templates()
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        def load_all():
+            for name in names:
+                get_template(name)
+
+        return {
+            mode + ' load all': summarize(time_calls(load_all, repeat)),
+            mode + ' render home.html': summarize(time_calls(
+                lambda: render_to_string(
+                    'home.html', {'form': ItemForm()}, request=request
+                ),
+                repeat
+            )),
+            mode + ' render list.html': summarize(time_calls(
+                lambda: render_to_string('list.html', {
+                    'list': list_, 'form': ExistingListItemForm(for_list=list_)
+                }, request=request),
+                repeat
+            )),
+        }
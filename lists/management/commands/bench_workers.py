@@ -0,0 +1,194 @@
+import http.client
+import json
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from superlists.bench import summarize, write_report
+
+GUNICORN_CONFIG = os.path.join(
+    settings.BASE_DIR, 'deploy_tools', 'gunicorn-config.template.py'
+)
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gunicorn.workers.gthread.ThreadWorker',
+}
+
+class SlowVerifier(socketserver.ThreadingMixIn, HTTPServer):
+    # stands in for the Persona verifier, rejecting every assertion after
+    # `delay` seconds
+    daemon_threads = True
+
+    def __init__(self, delay):
+        self.delay = delay
+        super().__init__(('127.0.0.1', 0), SlowVerifierHandler)
+
+class SlowVerifierHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.delay)
+        body = json.dumps({'status': 'failure', 'reason': 'bench'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class Command(BaseCommand):
+    help = 'Compares sync and threaded gunicorn workers on a mix of fast ' \
+           'pages and logins held up by a slow verifier'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4,
+                            help='threads per gthread worker')
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=20,
+                            help='requests per client')
+        parser.add_argument('--verify-delay', type=float, default=0.1,
+                            help='seconds the stub verifier takes to answer')
+        parser.add_argument('--gunicorn', default=shutil.which(
+            'gunicorn', path=os.path.dirname(sys.executable)
+        ) or 'gunicorn')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        verifier = SlowVerifier(options['verify_delay'])
+        threading.Thread(target=verifier.serve_forever, daemon=True).start()
+        results = {}
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                self.write_settings(directory, verifier.server_address[1])
+                for mode, threads in (('sync', 1), ('gthread', options['threads'])):
+                    results[mode] = self.bench_mode(
+                        mode, threads, directory, options
+                    )
+        finally:
+            verifier.shutdown()
+            verifier.server_close()
+        write_report(self.stdout, results, options['json'])
+
+    def write_settings(self, directory, verifier_port):
+        with open(os.path.join(directory, 'bench_workers_settings.py'), 'w') as f:
+            f.write(
+                'from %s import *\n'
+                'from superlists.cache import isolated_caches\n'
+                'PERSONA_VERIFY_URL = "http://127.0.0.1:%d/verify"\n'
+                'ALLOWED_HOSTS = ["127.0.0.1"]\n'
+                'CACHES = isolated_caches(CACHES, %r)\n' % (
+                    settings.SETTINGS_MODULE, verifier_port, directory
+                )
+            )
+
+    def bench_mode(self, mode, threads, directory, options):
+        port = free_port()
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='bench_workers_settings',
+            PYTHONPATH=os.pathsep.join(
+                [directory, settings.BASE_DIR] + sys.path
+            ),
+        )
+        log_path = os.path.join(directory, mode + '.log')
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen([
+                options['gunicorn'],
+                '--config', GUNICORN_CONFIG,
+                '--bind', '127.0.0.1:%d' % (port,),
+                '--worker-class', WORKER_CLASSES[mode],
+                '--workers', str(options['workers']),
+                '--threads', str(threads),
+                '--access-logfile', os.devnull,
+                '--error-logfile', log_path,
+                '--chdir', settings.BASE_DIR,
+                'superlists.wsgi:application',
+            ], env=env, stdout=log, stderr=log)
+        try:
+            self.wait_until_up(port, server, log_path)
+            return self.drive(port, options['clients'], options['requests'])
+        finally:
+            server.terminate()
+            server.wait()
+
+    def wait_until_up(self, port, server, log_path):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            try:
+                if self.request(port, 'GET', '/')[0] == 200:
+                    return
+            except OSError:
+                time.sleep(0.1)
+        with open(log_path) as log:
+            raise CommandError('gunicorn did not start:\n' + log.read()[-2000:])
+
+    def request(self, port, method, path, body=None, headers=None):
+        # a connection per request, as nginx proxies them
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            connection.request(method, path, body, headers or {})
+            response = connection.getresponse()
+            response.read()
+            return response.status, response.getheader('Set-Cookie', '')
+        finally:
+            connection.close()
+
+    def drive(self, port, clients, requests):
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def client():
+            _, set_cookie = self.request(port, 'GET', '/')
+            token = SimpleCookie(set_cookie)[settings.CSRF_COOKIE_NAME].value
+            login_headers = {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Cookie': '%s=%s' % (settings.CSRF_COOKIE_NAME, token),
+                'X-CSRFToken': token,
+            }
+            for i in range(requests):
+                start = time.perf_counter()
+                if i % 2:
+                    status, _ = self.request(
+                        port, 'POST', '/accounts/login',
+                        'assertion=bench', login_headers
+                    )
+                else:
+                    status, _ = self.request(port, 'GET', '/')
+                with lock:
+                    timings.append(time.perf_counter() - start)
+                    if status != 200:
+                        errors.append(status)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        result = summarize(timings)
+        result['errors'] = len(errors)
+        result['throughput_rps'] = round(len(timings) / elapsed, 1)
+        return result
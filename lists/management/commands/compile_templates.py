@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from superlists.warmup import compile_templates, project_templates
+
+class Command(BaseCommand):
+    help = 'Compiles every project template, failing if any does not compile'
+
+    def handle(self, *args, **options):
+        failures = compile_templates()
+        if failures:
+            raise CommandError('\n'.join(
+                '%s: %s' % (name, error) for name, error in sorted(failures.items())
+            ))
+        self.stdout.write('compiled %d templates' % (len(project_templates()),))
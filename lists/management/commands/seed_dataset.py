@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lists.dataset import add_dataset_arguments, dataset_options, generate
+from lists.models import BULK_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Fills the database with a reproducible synthetic dataset'
+
+    def add_arguments(self, parser):
+        add_dataset_arguments(parser)
+        parser.add_argument('--prefix', default='seed',
+                            help='prefix of the generated users\' emails')
+        parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = generate(
+            prefix=options['prefix'], batch_size=options['batch_size'],
+            **dataset_options(options)
+        )
+        self.stdout.write(
+            'created %d users, %d lists, %d items and %d shares in %.1fs' % (
+                counts.users, counts.lists, counts.items, counts.shares,
+                time.perf_counter() - start,
+            )
+        )
@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter, so nothing has been imported yet; prints a
+# JSON report of each boot phase and each module's import time
+PROFILER = r'''
+import json
+import sys
+import time
+
+modules = {}
+stack = []
+
+class TimingFinder(object):
+    # finds modules through the other finders, then times their loaders
+
+    @classmethod
+    def find_spec(cls, name, path=None, target=None):
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is cls or find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return spec
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += total
+                modules[name] = (total - children, total)
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+sys.meta_path.insert(0, TimingFinder)
+phases = {}
+
+start = time.perf_counter()
+import django
+django.setup()
+phases['apps ready'] = time.perf_counter() - start
+
+from django.conf import settings
+start = time.perf_counter()
+__import__(settings.WSGI_APPLICATION.rsplit('.', 1)[0])
+phases['wsgi application'] = time.perf_counter() - start
+
+start = time.perf_counter()
+from django.core.urlresolvers import resolve
+resolve('/')
+phases['urlconf'] = time.perf_counter() - start
+
+json.dump({'phases': phases, 'modules': modules}, sys.stdout)
+'''
+
+class Command(BaseCommand):
+    help = 'Reports how long a worker takes to boot, per phase and per imported module'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25,
+                            help='how many of the slowest modules to list')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+            PYTHONPATH=os.pathsep.join(sys.path),
+        )
+        process = subprocess.Popen(
+            [sys.executable, '-c', PROFILER],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=settings.BASE_DIR,
+        )
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError('profiled boot failed:\n' + err.decode()[-2000:])
+        report = json.loads(out.decode())
+
+        phases = {
+            name: round(1000 * seconds, 3)
+            for name, seconds in report['phases'].items()
+        }
+        slowest = sorted(
+            report['modules'].items(), key=lambda item: item[1][0], reverse=True
+        )[:options['limit']]
+        modules = [
+            {'module': name, 'self_ms': round(1000 * own, 3),
+             'cumulative_ms': round(1000 * total, 3)}
+            for name, (own, total) in slowest
+        ]
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'phases_ms': phases, 'modules': modules}, indent=2, sort_keys=True
+            ))
+            return
+        for name in ('apps ready', 'wsgi application', 'urlconf'):
+            self.stdout.write('%-24s %9.3f ms' % (name, phases[name]))
+        self.stdout.write('%d modules imported; slowest by own time:' % (
+            len(report['modules']),
+        ))
+        for module in modules:
+            self.stdout.write('%9.3f ms %9.3f ms  %s' % (
+                module['self_ms'], module['cumulative_ms'], module['module']
+            ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from lists.models import ItemToken
+
+class Command(BaseCommand):
+    help = "Indexes the items added since the last run for search, where " \
+           "PostgreSQL's full-text index isn't available; run it from cron"
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            self.stdout.write('PostgreSQL indexes items as they are written')
+            return
+        self.stdout.write('indexed %d items' % (ItemToken.catch_up(),))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def backfill_list_names(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    Item = apps.get_model('lists', 'Item')
+    for list_ in List.objects.filter(name='').iterator():
+        first_item = Item.objects.filter(list=list_).order_by('id').first()
+        if first_item is not None:
+            List.objects.filter(pk=list_.pk).update(name=first_item.text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_list_shared_with'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='name',
+            field=models.TextField(default='', blank=True),
+        ),
+        migrations.RunPython(backfill_list_names, migrations.RunPython.noop),
+    ]
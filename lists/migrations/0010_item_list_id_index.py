@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0009_list_version'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='item',
+            index_together=set([('list', 'id')]),
+        ),
+    ]
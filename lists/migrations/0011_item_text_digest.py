@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import models, migrations
+
+
+def backfill_text_digests(apps, schema_editor):
+    Item = apps.get_model('lists', 'Item')
+    items = Item.objects.filter(text_digest='').values_list('id', 'text')
+    for id_, text in items.iterator():
+        Item.objects.filter(id=id_).update(
+            text_digest=hashlib.sha256(text.encode()).hexdigest()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0010_item_list_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='text_digest',
+            field=models.CharField(max_length=64, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_text_digests, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='item',
+            unique_together=set([('list', 'text_digest')]),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def create_search_index(apps, schema_editor):
+    # PostgreSQL searches the item text through a full-text index, so the
+    # unmanaged ItemToken table is only created on other databases, where
+    # the update_search_index command fills it in
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX lists_item_text_search ON lists_item "
+            "USING gin (to_tsvector('english', text))"
+        )
+    else:
+        # create_model leaves out the indexes of an unmanaged model
+        schema_editor.create_model(apps.get_model('lists', 'ItemToken'))
+        schema_editor.execute(
+            "CREATE INDEX lists_itemtoken_token_list ON lists_itemtoken "
+            "(token, list_id)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX lists_item_text_search')
+    else:
+        schema_editor.delete_model(apps.get_model('lists', 'ItemToken'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0011_item_text_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemToken',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('token', models.CharField(max_length=64)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('item', models.ForeignKey(to='lists.Item', on_delete=models.DO_NOTHING)),
+                ('list', models.ForeignKey(to='lists.List', on_delete=models.DO_NOTHING)),
+            ],
+            options={
+                'managed': False,
+                'index_together': set([('token', 'list')]),
+                'unique_together': set([('item', 'token')]),
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
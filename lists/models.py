@@ -1,35 +1,367 @@
-from django.db import models
+import hashlib
+import re
+from collections import Counter, namedtuple, OrderedDict
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.utils import timezone
+
+LISTS_PAGE_SIZE = 50
+ITEMS_PAGE_SIZE = 500
+BULK_BATCH_SIZE = 500
+SEARCH_PAGE_SIZE = 20
+
+TOKEN = re.compile(r'\w+')
+TOKEN_MAX_LENGTH = 64
+# must match the expression the full-text index is built on
+ITEM_TSVECTOR = "to_tsvector('english', lists_item.text)"
+
+# `added` and `duplicates` hold item texts, `empty` the positions of
+# blank texts in the input
+BulkAddResult = namedtuple('BulkAddResult', ['added', 'duplicates', 'empty'])
+
+def batches(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+# keyset pagination: returns up to `size` rows with an id above `after`,
+# and the `after` value for the next page (None on the last page)
+def keyset_page(queryset, after, size):
+    queryset = queryset.order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset[:size + 1])
+    if len(rows) > size:
+        return rows[:size], rows[size - 1].id
+    return rows, None
+
+def tokenize(text):
+    # the words an item is indexed under, with how often each occurs
+    return Counter(
+        token[:TOKEN_MAX_LENGTH] for token in TOKEN.findall(text.lower())
+    )
+
+class ListQuerySet(models.QuerySet):
+
+    def page(self, after=None, size=None):
+        return keyset_page(
+            self.only('id', 'name'), after, size or LISTS_PAGE_SIZE
+        )
+
+    def visible_to(self, user):
+        # the shared lists come from a subquery rather than a join, so both
+        # sides of the OR can use an index
+        shared = self.model.shared_with.through.objects.filter(user=user)
+        return self.filter(Q(owner=user) | Q(id__in=shared.values('list_id')))
 
 # Create your models here.
 class List(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, blank=True, null=True)
     shared_with = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='sharee_lists')
+    # text of the first item, kept up to date by Item.save so that pages
+    # listing many lists don't need a query per list to name them
+    name = models.TextField(default='', blank=True)
+    # bumped whenever an item or sharee is added, changed or removed, for
+    # conditional GETs and the cached list fragments
+    version = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    objects = ListQuerySet.as_manager()
+
+    def items_page(self, after=None, size=None):
+        return keyset_page(self.item_set.all(), after, size or ITEMS_PAGE_SIZE)
 
-    @property
-    def name(self):
-        first_item = self.item_set.first()
-        return first_item.text
+    def item_chunks(self, size=None):
+        after = None
+        while True:
+            items, after = self.items_page(after, size)
+            if items:
+                yield items
+            if after is None:
+                return
+
+    def touch(self, **updates):
+        self.modified = List.bump(self.pk, **updates)
+        self.version += 1
+
+    @staticmethod
+    def bump(pk, **updates):
+        # for when only the list's id is at hand
+        modified = timezone.now()
+        List.objects.filter(pk=pk).update(
+            version=F('version') + 1, modified=modified, **updates
+        )
+        return modified
+
+    def items_added(self, first_text):
+        # one UPDATE bumps the version and, for a list that had no items,
+        # takes its name from the first one
+        if self.name:
+            self.touch()
+        else:
+            self.touch(name=Case(
+                When(name='', then=Value(first_text)),
+                default=F('name'),
+                output_field=models.TextField()
+            ))
+            self.name = first_text
+
+    def add_items(self, texts):
+        texts = list(texts)
+        candidates = list(OrderedDict.fromkeys(text for text in texts if text))
+        with transaction.atomic():
+            # lock the list so concurrent bulk adds can't race on uniqueness
+            List.objects.select_for_update().get(pk=self.pk)
+            existing = set()
+            for batch in batches(candidates, BULK_BATCH_SIZE):
+                existing.update(self.item_set.filter(
+                    text_digest__in=[Item.digest(text) for text in batch]
+                ).order_by().values_list('text', flat=True))
+            added = [text for text in candidates if text not in existing]
+            Item.objects.bulk_create(
+                [Item.build(self, text) for text in added],
+                batch_size=BULK_BATCH_SIZE
+            )
+            if added:
+                self.items_added(added[0])
+
+        duplicates, empty = [], []
+        pending = set(added)
+        for position, text in enumerate(texts):
+            if not text:
+                empty.append(position)
+            elif text in pending:
+                pending.remove(text)
+            else:
+                duplicates.append(text)
+        return BulkAddResult(added=added, duplicates=duplicates, empty=empty)
 
     def get_absolute_url(self):
         return reverse('view_list', args=[self.id])
 
     @staticmethod
     def create_new(first_item_text, owner=None):
-        list_ = List.objects.create()
-        list_.owner = owner
-        list_.save()
-        item = Item.objects.create(text=first_item_text, list=list_)
+        with transaction.atomic():
+            list_ = List.objects.create(owner=owner, name=first_item_text)
+            # the list is brand new, so skip Item.save's version bump
+            Item.objects.bulk_create([Item.build(list_, first_item_text)])
         return list_
 
+    @staticmethod
+    def create_many(entries):
+        # entries are (first_item_text, owner) pairs
+        lists = [List(owner=owner, name=text) for text, owner in entries]
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # bulk_create can't hand back ids, so take them from the
+                # sequence up front and insert the lists in batches too
+                for list_, id_ in zip(lists, _reserve_list_ids(len(lists))):
+                    list_.id = id_
+                List.objects.bulk_create(lists, batch_size=BULK_BATCH_SIZE)
+            else:
+                for list_ in lists:
+                    list_.save(force_insert=True)
+            Item.objects.bulk_create(
+                [Item.build(list_, list_.name) for list_ in lists],
+                batch_size=BULK_BATCH_SIZE
+            )
+        return lists
+
+def _reserve_list_ids(count):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            [List._meta.db_table, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
 class Item(models.Model):
     text = models.TextField(default='')
     list = models.ForeignKey(List, default=None)
+    # uniqueness is enforced on a digest of the text, since texts can be
+    # too long to index
+    text_digest = models.CharField(max_length=64, default='', editable=False)
 
     class Meta:
         ordering = ('id',)
-        unique_together = ('list', 'text')
+        unique_together = ('list', 'text_digest')
+        # serves the per-list, id-ordered scans of every list page
+        index_together = ('list', 'id')
 
     def __str__(self):
-        return self.text
\ No newline at end of file
+        return self.text
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @staticmethod
+    def build(list_, text):
+        # for bulk_create, which bypasses save()
+        return Item(list=list_, text=text, text_digest=Item.digest(text))
+
+    def validate_unique(self, exclude=None):
+        self.text_digest = Item.digest(self.text)
+        super().validate_unique(exclude=exclude)
+
+    def save(self, *args, **kwargs):
+        creating = self.pk is None
+        self.text_digest = Item.digest(self.text)
+        super().save(*args, **kwargs)
+        if creating:
+            self.list.items_added(self.text)
+        else:
+            self.list.touch()
+            if connection.vendor != 'postgresql':
+                ItemToken.reindex(self)
+
+class ItemTokenManager(models.Manager):
+    # there is no table to read on PostgreSQL, for anything that walks
+    # every model, such as dumpdata
+    use_for_related_fields = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.none() if connection.vendor == 'postgresql' else queryset
+
+class ItemToken(models.Model):
+    # the inverted index searched where PostgreSQL's full-text search isn't
+    # available, and only there; migration 0012 creates the table on the
+    # other databases, so the model is unmanaged. A row per distinct word
+    # of each item, added in id order by the update_search_index command,
+    # so writing items and searching them costs nothing extra
+    token = models.CharField(max_length=TOKEN_MAX_LENGTH)
+    # not cascaded, since on PostgreSQL there is no table to delete from;
+    # item_deleted removes the rows instead
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING)
+    # copied from the item, so searches can be limited to the lists a user
+    # can see without joining the items
+    list = models.ForeignKey(List, on_delete=models.DO_NOTHING)
+    count = models.PositiveIntegerField(default=1)
+
+    objects = ItemTokenManager()
+
+    class Meta:
+        managed = False
+        unique_together = ('item', 'token')
+        index_together = ('token', 'list')
+
+    @staticmethod
+    def catch_up():
+        # indexes the items added since the newest indexed one, a batch at
+        # a time, and returns how many it indexed
+        if connection.vendor == 'postgresql':
+            return 0
+        after = ItemToken.objects.aggregate(last=Max('item'))['last'] or 0
+        indexed = 0
+        while True:
+            rows = list(Item.objects.filter(id__gt=after).order_by('id').values_list(
+                'id', 'list_id', 'text'
+            )[:BULK_BATCH_SIZE])
+            if not rows:
+                return indexed
+            try:
+                with transaction.atomic():
+                    ItemToken.index(rows)
+            except IntegrityError:
+                # a concurrent run indexed them first
+                return indexed
+            indexed += len(rows)
+            after = rows[-1][0]
+
+    @staticmethod
+    def index(rows):
+        # rows are (item id, list id, text)
+        ItemToken.objects.bulk_create([
+            ItemToken(token=token, item_id=id_, list_id=list_id, count=count)
+            for id_, list_id, text in rows
+            for token, count in tokenize(text).items()
+        ], batch_size=BULK_BATCH_SIZE)
+
+    @staticmethod
+    def reindex(item):
+        ItemToken.objects.filter(item_id=item.id).delete()
+        # an item catch_up hasn't reached yet is left to it, since indexing
+        # it now would make catch_up skip the items before it
+        if ItemToken.objects.filter(item_id__gt=item.id).exists():
+            ItemToken.index([(item.id, item.list_id, item.text)])
+
+def item_deleted(sender, instance, **kwargs):
+    if connection.vendor != 'postgresql':
+        ItemToken.objects.filter(item_id=instance.id).delete()
+
+pre_delete.connect(item_deleted, sender=Item)
+
+def item_removed(sender, instance, **kwargs):
+    List.bump(instance.list_id)
+
+post_delete.connect(item_removed, sender=Item)
+
+def ranked_search_sql(visible, query, offset, limit):
+    # PostgreSQL's ids of the items matching the query, best first; the
+    # query is parsed once, in the FROM clause, and matched against the
+    # indexed expression
+    visible_sql, visible_params = visible.query.sql_with_params()
+    sql = (
+        "SELECT lists_item.id FROM lists_item, "
+        "plainto_tsquery('english', %s) AS search_query "
+        "WHERE {vector} @@ search_query AND lists_item.list_id IN ({visible}) "
+        "ORDER BY ts_rank({vector}, search_query) DESC, lists_item.id DESC "
+        "LIMIT %s OFFSET %s"
+    ).format(vector=ITEM_TSVECTOR, visible=visible_sql)
+    return sql, [query] + list(visible_params) + [limit, offset]
+
+def search_items(user, query, page=1, size=None):
+    # items in lists the user owns or shares that contain every word of
+    # the query, best matches first; returns a page of them and the number
+    # of the next page (None on the last one)
+    size = size or SEARCH_PAGE_SIZE
+    start = (page - 1) * size
+    visible = List.objects.visible_to(user).values('id')
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(*ranked_search_sql(visible, query, start, size + 1))
+            ids = [row[0] for row in cursor.fetchall()]
+    else:
+        terms = set(tokenize(query))
+        if not terms:
+            return [], None
+        # only finds items update_search_index has reached; ranked by how often the query's words occur in each item
+        ids = list(ItemToken.objects.filter(
+            token__in=terms, list__in=visible
+        ).values('item').annotate(
+            terms=Count('id'), rank=Sum('count')
+        ).filter(terms=len(terms)).order_by('-rank', '-item').values_list(
+            'item', flat=True
+        )[start:start + size + 1])
+    found = Item.objects.select_related('list').in_bulk(ids)
+    items = [found[id_] for id_ in ids]
+    if len(items) > size:
+        return items[:size], page + 1
+    return items, None
+
+def sharees_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # clearing a user's shared lists names no lists, so note which
+        # they are while they can still be found
+        instance._cleared_list_ids = set(
+            instance.sharee_lists.values_list('id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.touch()
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_list_ids', None)
+    if pk_set:
+        List.objects.filter(pk__in=pk_set).update(
+            version=F('version') + 1, modified=timezone.now()
+        )
+
+m2m_changed.connect(sharees_changed, sender=List.shared_with.through)
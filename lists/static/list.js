@@ -1,5 +1,32 @@
 $(document).ready(function() {
-    $('#id_text').on('focus', function () {
+    // not only on focus: after a failed submit the box still has it
+    $(document).on('focus keypress input click', '#id_text', function () {
         $('.has-error').hide();
     });
+
+    // delegated, so it keeps working if the form is re-rendered
+    $(document).on('submit', '#id_item_form', function (event) {
+        var form = $(this);
+        var input = form.find('#id_text');
+        event.preventDefault();
+        $.post(form.data('items-url'), {
+            text: input.val(),
+            rows: $('#id_list_table tr').length,
+            csrfmiddlewaretoken: form.find('input[name=csrfmiddlewaretoken]').val()
+        }).done(function (data) {
+            form.find('.has-error').remove();
+            $('#id_list_table').append(data.row);
+            input.val('');
+        }).fail(function (xhr) {
+            // anything but a 400 may have come after the item was saved, so
+            // posting it again could add it twice
+            var message = xhr.status === 400 ?
+                xhr.responseJSON.errors.join(' ') :
+                "Your item may not have been saved. Reload the page to check.";
+            form.find('.has-error').remove();
+            $('<div class="form-group has-error"><span class="help-block"></span></div>')
+                .find('.help-block').text(message).end()
+                .appendTo(form);
+        });
+    });
 });
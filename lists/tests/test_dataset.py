@@ -0,0 +1,80 @@
+import argparse
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from lists.dataset import add_dataset_arguments, dataset_options, generate
+from lists.models import Item, List
+
+User = get_user_model()
+
+class GenerateTest(TestCase):
+
+    def snapshot(self):
+        return [
+            (list_.name, list_.owner_id,
+             [item.text for item in list_.item_set.all()],
+             sorted(user.email for user in list_.shared_with.all()))
+            for list_ in List.objects.order_by('id')
+        ]
+
+    def test_counts_match_the_database(self):
+        counts = generate(users=5, lists=30, items_mean=4, shares_mean=1,
+                          batch_size=7)
+        self.assertEqual(counts.users, User.objects.count())
+        self.assertEqual(counts.lists, List.objects.count())
+        self.assertEqual(counts.items, Item.objects.count())
+        self.assertEqual(counts.shares, List.shared_with.through.objects.count())
+        self.assertEqual(counts.lists, 30)
+
+    def test_same_seed_gives_same_dataset(self):
+        generate(users=5, lists=20, items_mean=4, seed=3, batch_size=6)
+        first = self.snapshot()
+        List.objects.all().delete()
+        generate(users=5, lists=20, items_mean=4, seed=3, batch_size=6)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_different_seeds_give_different_datasets(self):
+        generate(users=5, lists=20, items_mean=4, seed=1)
+        first = self.snapshot()
+        List.objects.all().delete()
+        generate(users=5, lists=20, items_mean=4, seed=2)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_lists_are_named_after_their_first_item(self):
+        generate(users=3, lists=10, items_mean=3)
+        for list_ in List.objects.all():
+            self.assertEqual(list_.name, list_.item_set.first().text)
+
+    def test_items_per_list_are_capped(self):
+        generate(users=3, lists=50, items_mean=20, items_max=5)
+        for list_ in List.objects.all():
+            self.assertLessEqual(list_.item_set.count(), 5)
+
+    def test_anonymous_ratio(self):
+        generate(users=3, lists=20, anonymous_ratio=1)
+        self.assertFalse(List.objects.filter(owner__isnull=False).exists())
+        self.assertFalse(List.shared_with.through.objects.exists())
+
+    def test_lists_are_not_shared_with_their_owner(self):
+        generate(users=3, lists=40, shares_mean=3, anonymous_ratio=0)
+        self.assertGreater(List.shared_with.through.objects.count(), 0)
+        for list_ in List.objects.all():
+            self.assertNotIn(list_.owner, list_.shared_with.all())
+
+    def test_rerunning_reuses_existing_users(self):
+        generate(users=4, lists=2)
+        counts = generate(users=4, lists=2)
+        self.assertEqual(counts.users, 0)
+        self.assertEqual(User.objects.count(), 4)
+
+class DatasetArgumentsTest(SimpleTestCase):
+
+    def test_defaults_come_from_the_arguments(self):
+        parser = argparse.ArgumentParser()
+        add_dataset_arguments(parser, users=3, lists=4, items_mean=5, items_max=6)
+        options = dataset_options(vars(parser.parse_args([])))
+        self.assertEqual(
+            (options['users'], options['lists'], options['items_mean'], options['items_max']),
+            (3, 4, 5, 6)
+        )
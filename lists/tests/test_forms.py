@@ -1,6 +1,8 @@
 from unittest import skip
 from unittest.mock import patch, Mock
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from lists.forms import (
     DUPLICATE_ITEM_ERROR, EMPTY_LIST_ERROR,
@@ -53,6 +55,67 @@ class ExistingListItemFormTest(TestCase):
         new_item = form.save()
         self.assertEqual(new_item, Item.objects.first())
 
+    def test_form_validation_does_not_insert(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={'text': 'hi'})
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_form_save_does_not_select_before_insert(self):
+        list_ = List.create_new('first')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'second'})
+        form.is_valid()
+        with CaptureQueriesContext(connection) as context:
+            form.save()
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT') for query in context.captured_queries
+        ))
+
+    def test_form_validation_for_duplicate_long_items(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='x' * 100000)
+        form = ExistingListItemForm(for_list=list_, data={'text': 'x' * 100000})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['text'], [DUPLICATE_ITEM_ERROR])
+
+    def test_digest_clash_with_other_text_is_not_a_duplicate(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='one')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'two'})
+        with patch('lists.models.Item.digest', return_value='same'):
+            Item.objects.filter(list=list_).update(text_digest='same')
+            with self.assertRaises(IntegrityError):
+                form.save()
+
+    def test_duplicate_leaves_only_original_item(self):
+        list_ = List.create_new('no twins')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'no twins'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list_.item_set.count(), 1)
+
+    def test_duplicate_added_after_validation_is_a_form_error(self):
+        list_ = List.create_new('first')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'racer'})
+        self.assertTrue(form.is_valid())
+        Item.objects.create(list=list_, text='racer')
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors['text'], [DUPLICATE_ITEM_ERROR])
+        self.assertEqual(list_.item_set.filter(text='racer').count(), 1)
+
+    def test_invalid_form_save_raises(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={'text': ''})
+        with self.assertRaises(ValueError):
+            form.save()
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_form_save_names_empty_list(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={'text': 'hi'})
+        form.save()
+        self.assertEqual(List.objects.get(id=list_.id).name, 'hi')
+
 class NewListFormTest(TestCase):
 
     @patch('lists.forms.List.create_new')
@@ -1,7 +1,14 @@
+import hashlib
+import io
+from unittest import skipIf
+from unittest.mock import patch
+
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from lists.models import Item, List
+from lists.models import Item, ItemToken, List, search_items
 
 User = get_user_model()
 
@@ -39,6 +46,26 @@ class ItemModelTest(TestCase):
         item = Item(list=list2, text='bla')
         item.full_clean()  # should not raise
 
+    def test_saving_stores_digest_of_text(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text='bla')
+        self.assertEqual(
+            Item.objects.get(id=item.id).text_digest,
+            hashlib.sha256(b'bla').hexdigest()
+        )
+
+    def test_duplicate_long_items_are_rejected_by_database(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='x' * 100000)
+        with self.assertRaises(IntegrityError):
+            Item.objects.create(list=list_, text='x' * 100000)
+
+    def test_long_items_differing_at_the_end_are_distinct(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='x' * 100000 + 'a')
+        item = Item(list=list_, text='x' * 100000 + 'b')
+        item.full_clean()  # should not raise
+
     def test_string_representation(self):
         item = Item(text='some text')
         self.assertEqual(str(item), 'some text')
@@ -71,6 +98,30 @@ class ListModelTest(TestCase):
         new_list = List.objects.first()
         self.assertEqual(new_list.owner, user)
 
+    def test_create_new_inserts_list_and_item_only(self):
+        user = User.objects.create(email="a@b.com")
+        # savepoint, list insert, item insert, release
+        with self.assertNumQueries(4):
+            List.create_new(first_item_text='item 1 text', owner=user)
+
+    def test_create_new_leaves_no_list_if_item_insert_fails(self):
+        with patch.object(Item.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                List.create_new(first_item_text='item 1 text')
+        self.assertEqual(List.objects.count(), 0)
+
+    def test_create_many_creates_lists_with_owners_and_first_items(self):
+        user = User.objects.create(email="a@b.com")
+        lists = List.create_many([('first', user), ('second', None)])
+        self.assertEqual(list(List.objects.all()), lists)
+        self.assertEqual(lists[0].owner, user)
+        self.assertIsNone(lists[1].owner)
+        self.assertEqual(
+            [(item.list, item.text) for item in Item.objects.all()],
+            [(lists[0], 'first'), (lists[1], 'second')]
+        )
+        self.assertEqual(List.objects.get(id=lists[1].id).name, 'second')
+
     def test_lists_can_have_owners(self):
         List(owner=User()) # should not raise
 
@@ -87,6 +138,113 @@ class ListModelTest(TestCase):
         Item.objects.create(list=list_, text='second item')
         self.assertEqual(list_.name, 'first item')
 
+    def test_list_name_is_stored_on_list(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='first item')
+        Item.objects.create(list=list_, text='second item')
+        self.assertEqual(List.objects.get(id=list_.id).name, 'first item')
+
+    def test_create_new_stores_list_name(self):
+        list_ = List.create_new(first_item_text='new item text')
+        self.assertEqual(List.objects.get(id=list_.id).name, 'new item text')
+
+    def test_page_returns_lists_in_id_order_with_next_cursor(self):
+        lists = [List.create_new('item %d' % (i,)) for i in range(5)]
+        page, next_after = List.objects.page(size=2)
+        self.assertEqual(page, lists[:2])
+        self.assertEqual(next_after, lists[1].id)
+        page, next_after = List.objects.page(after=next_after, size=2)
+        self.assertEqual(page, lists[2:4])
+
+    def test_last_page_has_no_next_cursor(self):
+        lists = [List.create_new('item %d' % (i,)) for i in range(2)]
+        page, next_after = List.objects.page(size=2)
+        self.assertEqual(page, lists)
+        self.assertIsNone(next_after)
+
+    def test_item_chunks_yields_all_items_in_order(self):
+        list_ = List.create_new('item 0')
+        for i in range(1, 5):
+            Item.objects.create(list=list_, text='item %d' % (i,))
+        chunks = list(list_.item_chunks(size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(
+            [item.text for chunk in chunks for item in chunk],
+            ['item %d' % (i,) for i in range(5)]
+        )
+
+    def test_add_items_inserts_new_items_in_order(self):
+        list_ = List.create_new('first')
+        result = list_.add_items(['second', 'third'])
+        self.assertEqual(result.added, ['second', 'third'])
+        self.assertEqual(
+            [item.text for item in list_.item_set.all()],
+            ['first', 'second', 'third']
+        )
+
+    def test_add_items_rejects_existing_and_repeated_texts(self):
+        list_ = List.create_new('first')
+        result = list_.add_items(['first', 'new', 'new'])
+        self.assertEqual(result.added, ['new'])
+        self.assertEqual(result.duplicates, ['first', 'new'])
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_add_items_reports_positions_of_empty_texts(self):
+        list_ = List.create_new('first')
+        result = list_.add_items(['', 'a', ''])
+        self.assertEqual(result.added, ['a'])
+        self.assertEqual(result.empty, [0, 2])
+
+    def test_add_items_names_an_empty_list(self):
+        list_ = List.objects.create()
+        list_.add_items(['a', 'b'])
+        self.assertEqual(List.objects.get(id=list_.id).name, 'a')
+
+    def test_add_items_uses_batched_statements(self):
+        list_ = List.create_new('first')
+        texts = ['item %d' % (i,) for i in range(10)]
+        with patch('lists.models.BULK_BATCH_SIZE', 5):
+            # savepoint, lock, two uniqueness selects, two inserts,
+            # version bump, release
+            with self.assertNumQueries(8):
+                list_.add_items(texts)
+        self.assertEqual(list_.item_set.count(), 11)
+
+    def test_new_list_starts_at_version_zero(self):
+        list_ = List.create_new('first')
+        self.assertEqual(List.objects.get(id=list_.id).version, 0)
+
+    def test_adding_item_bumps_version_and_modified(self):
+        list_ = List.create_new('first')
+        before = List.objects.get(id=list_.id)
+        Item.objects.create(list=list_, text='second')
+        after = List.objects.get(id=list_.id)
+        self.assertEqual(after.version, before.version + 1)
+        self.assertGreater(after.modified, before.modified)
+        self.assertEqual(list_.version, after.version)
+
+    def test_add_items_bumps_version_once(self):
+        list_ = List.create_new('first')
+        list_.add_items(['a', 'b', 'c'])
+        self.assertEqual(List.objects.get(id=list_.id).version, 1)
+
+    def test_sharing_bumps_version(self):
+        list_ = List.create_new('first')
+        user = User.objects.create(email="a@b.com")
+        list_.shared_with.add(user)
+        self.assertEqual(List.objects.get(id=list_.id).version, 1)
+        user.sharee_lists.remove(list_)
+        self.assertEqual(List.objects.get(id=list_.id).version, 2)
+
+    def test_clearing_a_users_shared_lists_bumps_their_versions(self):
+        lists = [List.create_new('first'), List.create_new('second')]
+        user = User.objects.create(email="a@b.com")
+        user.sharee_lists.add(*lists)
+        user.sharee_lists.clear()
+        self.assertEqual(
+            [list_.version for list_ in List.objects.order_by('id')], [2, 2]
+        )
+
     def test_has_shared_with_add_method(self):
         list_ = List.objects.create()
         user = User.objects.create(email="a@b.com")
@@ -94,4 +252,126 @@ class ListModelTest(TestCase):
         self.assertIn(
             user,
             list_.shared_with.all()
-        )
\ No newline at end of file
+        )
+
+class SearchItemsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+        self.other = User.objects.create(email='other@b.com')
+
+    def texts(self, items):
+        return [item.text for item in items]
+
+    def search(self, *args, **kwargs):
+        ItemToken.catch_up()
+        return search_items(self.user, *args, **kwargs)
+
+    def test_finds_items_in_owned_and_shared_lists_only(self):
+        List.create_new('buy milk', owner=self.user)
+        shared = List.create_new('milk the cow', owner=self.other)
+        shared.shared_with.add(self.user)
+        List.create_new('spilt milk', owner=self.other)
+        List.create_new('anonymous milk')
+        items, next_page = self.search('milk')
+        self.assertEqual(sorted(self.texts(items)), ['buy milk', 'milk the cow'])
+        self.assertIsNone(next_page)
+
+    def test_needs_every_word_of_the_query(self):
+        list_ = List.create_new('buy milk', owner=self.user)
+        list_.add_items(['buy bread', 'MILK and bread'])
+        items, _ = self.search('bread Milk')
+        self.assertEqual(self.texts(items), ['MILK and bread'])
+
+    def test_ranks_items_with_more_occurrences_first(self):
+        list_ = List.create_new('tea', owner=self.user)
+        list_.add_items(['more tea tea', 'tea tea tea please'])
+        items, _ = self.search('tea')
+        self.assertEqual(
+            self.texts(items), ['tea tea tea please', 'more tea tea', 'tea']
+        )
+
+    def test_pages_through_results(self):
+        list_ = List.create_new('item 0', owner=self.user)
+        list_.add_items(['item %d' % (i,) for i in range(1, 5)])
+        first, next_page = self.search('item', size=3)
+        self.assertEqual(next_page, 2)
+        rest, next_page = self.search('item', page=2, size=3)
+        self.assertIsNone(next_page)
+        self.assertEqual(
+            sorted(self.texts(first + rest)), ['item %d' % (i,) for i in range(5)]
+        )
+
+    def test_query_without_words_finds_nothing(self):
+        List.create_new('buy milk', owner=self.user)
+        self.assertEqual(self.search('  ?! '), ([], None))
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_searching_writes_nothing(self):
+        List.create_new('buy milk', owner=self.user)
+        self.assertEqual(search_items(self.user, 'milk'), ([], None))
+        self.assertFalse(ItemToken.objects.exists())
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_catch_up_indexes_items_from_every_insert_path(self):
+        list_ = List.create_new('first words', owner=self.user)
+        list_.add_items(['second words'])
+        Item.objects.create(list=list_, text='third words')
+        List.create_many([('fourth words', self.user)])
+        self.assertFalse(ItemToken.objects.exists())
+        self.assertEqual(ItemToken.catch_up(), 4)
+        self.assertEqual(
+            ItemToken.objects.filter(token='words').count(), 4
+        )
+        self.assertEqual(ItemToken.catch_up(), 0)
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    @patch('lists.models.BULK_BATCH_SIZE', 2)
+    def test_catch_up_indexes_new_items_a_batch_at_a_time(self):
+        list_ = List.create_new('word 0', owner=self.user)
+        ItemToken.catch_up()
+        list_.add_items(['word %d' % (i,) for i in range(1, 6)])
+        # the newest indexed item, then for each batch of two items a
+        # select, a savepoint, an insert per two tokens and a release, and
+        # a last select that finds nothing
+        with self.assertNumQueries(1 + 5 + 5 + 4 + 1):
+            self.assertEqual(ItemToken.catch_up(), 5)
+        self.assertEqual(len(self.search('word')[0]), 6)
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_update_search_index_command(self):
+        List.create_new('buy milk', owner=self.user)
+        out = io.StringIO()
+        call_command('update_search_index', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'indexed 1 items')
+        self.assertEqual(self.search('milk')[0][0].text, 'buy milk')
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_editing_an_indexed_item_reindexes_it(self):
+        list_ = List.create_new('old text', owner=self.user)
+        ItemToken.catch_up()
+        list_.add_items(['other text'])
+        ItemToken.catch_up()
+        item = list_.item_set.first()
+        item.text = 'new text'
+        item.save()
+        self.assertEqual(self.search('old'), ([], None))
+        self.assertEqual(self.search('new')[0], [item])
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_editing_an_item_before_it_is_indexed(self):
+        list_ = List.create_new('old text', owner=self.user)
+        item = list_.item_set.get()
+        item.text = 'new text'
+        item.save()
+        self.assertFalse(ItemToken.objects.exists())
+        self.assertEqual(self.search('old'), ([], None))
+        self.assertEqual(self.search('new')[0], [item])
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL indexes the item text')
+    def test_deleting_a_list_drops_its_tokens(self):
+        list_ = List.create_new('buy milk', owner=self.user)
+        list_.add_items(['more milk'])
+        ItemToken.catch_up()
+        list_.delete()
+        self.assertFalse(ItemToken.objects.exists())
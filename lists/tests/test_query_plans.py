@@ -0,0 +1,115 @@
+import os
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from lists.models import Item, ItemToken, List, ranked_search_sql
+from lists.transfer import items_after
+
+User = get_user_model()
+
+# raise these to check the plans against a bigger table
+LISTS = int(os.environ.get('SUPERLISTS_PLAN_LISTS', 50))
+ITEMS_PER_LIST = int(os.environ.get('SUPERLISTS_PLAN_ITEMS_PER_LIST', 100))
+
+def explain(queryset):
+    return explain_sql(*queryset.query.sql_with_params())
+
+def explain_sql(sql, params):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # with sequential scans priced out, a seq scan in the plan means
+            # there is no index that can serve the query at all
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql, params)
+        else:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+@skipUnless(
+    connection.vendor in ('postgresql', 'sqlite'),
+    'query plans are only checked on PostgreSQL and SQLite'
+)
+class QueryPlanTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # spread owners and sharees over many users, as in production, so
+        # the planner sees selective user columns
+        users = [
+            User.objects.create(email='user%d@b.com' % (i,))
+            for i in range(max(LISTS // 5, 2))
+        ]
+        lists = List.create_many(
+            [('list %d' % (i,), users[i % len(users)]) for i in range(LISTS)]
+        )
+        List.shared_with.through.objects.bulk_create(
+            List.shared_with.through(list=list_, user=users[(i + 1) % len(users)])
+            for i, list_ in enumerate(lists)
+        )
+        Item.objects.bulk_create(
+            Item.build(list_, 'item %d' % (i,))
+            for list_ in lists for i in range(1, ITEMS_PER_LIST)
+        )
+        if connection.vendor != 'postgresql':
+            ItemToken.catch_up()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = users[0]
+        cls.list = lists[LISTS // 2]
+
+    def assertUsesIndexes(self, plan):
+        for line in plan:
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Seq Scan', line, '\n'.join(plan))
+            elif re.match(r'SCAN (TABLE )?lists_', line):
+                self.assertRegex(line, 'INDEX|PRIMARY KEY', '\n'.join(plan))
+
+    def assertNoSort(self, plan):
+        for line in plan:
+            self.assertNotIn('TEMP B-TREE', line, '\n'.join(plan))
+            self.assertNotRegex(line, r'^\s*(->\s*)?Sort\b', '\n'.join(plan))
+
+    def test_view_list_items_use_list_id_index_in_id_order(self):
+        plan = explain(self.list.item_set.all())
+        self.assertUsesIndexes(plan)
+        self.assertNoSort(plan)
+
+    def test_view_list_item_pages_use_list_id_index_in_id_order(self):
+        after = self.list.item_set.all()[10].id
+        plan = explain(self.list.item_set.filter(id__gt=after).order_by('id')[:500])
+        self.assertUsesIndexes(plan)
+        self.assertNoSort(plan)
+
+    def test_first_item_lookup_uses_list_id_index(self):
+        plan = explain(Item.objects.filter(list=self.list).order_by('id')[:1])
+        self.assertUsesIndexes(plan)
+        self.assertNoSort(plan)
+
+    def test_export_item_pages_use_list_id_index_in_list_and_id_order(self):
+        ids = list(List.objects.filter(owner=self.user).values_list('id', flat=True))
+        after = Item.objects.filter(list_id=ids[0]).first()
+        plan = explain(items_after(ids, (ids[0], after.id))[:501])
+        self.assertUsesIndexes(plan)
+        self.assertNotIn('PRIMARY KEY', '\n'.join(plan))
+
+    def test_my_lists_owned_lists_use_index(self):
+        plan = explain(List.objects.filter(owner=self.user).order_by('id')[:51])
+        self.assertUsesIndexes(plan)
+
+    def test_my_lists_shared_lists_use_index(self):
+        plan = explain(List.objects.filter(shared_with=self.user).order_by('id')[:51])
+        self.assertUsesIndexes(plan)
+
+    def test_search_uses_search_index(self):
+        visible = List.objects.visible_to(self.user).values('id')
+        if connection.vendor == 'postgresql':
+            plan = explain_sql(*ranked_search_sql(visible, 'item', 0, 21))
+        else:
+            plan = explain(ItemToken.objects.filter(
+                token__in=['item', '7'], list__in=visible
+            ))
+        self.assertUsesIndexes(plan)
@@ -0,0 +1,136 @@
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from lists.models import List
+from lists.transfer import (
+    ImportResult, csv_lines, export_rows, import_rows, jsonl_lines, read_csv,
+    read_jsonl,
+)
+
+User = get_user_model()
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+
+    def test_exports_every_item_of_owned_lists_only(self):
+        first = List.create_new('buy milk', owner=self.user)
+        first.add_items(['buy eggs'])
+        second = List.create_new('call mum', owner=self.user)
+        List.create_new('not mine', owner=User.objects.create(email='c@d.com'))
+        List.create_new('anonymous')
+        self.assertEqual(sorted(export_rows(self.user)), [
+            (first.id, 'buy eggs'), (first.id, 'buy milk'), (second.id, 'call mum'),
+        ])
+
+    @patch('lists.models.LISTS_PAGE_SIZE', 2)
+    @patch('lists.transfer.ITEMS_PAGE_SIZE', 3)
+    def test_reads_a_page_at_a_time(self):
+        lists = [List.create_new('list %d' % (i,), owner=self.user) for i in range(3)]
+        for list_ in lists:
+            list_.add_items(['item %d' % (i,) for i in range(4)])
+        # two pages of lists; the first page's ten items take four queries
+        # and the second page's five take two
+        with self.assertNumQueries(8):
+            rows = list(export_rows(self.user))
+        self.assertEqual(len(rows), 15)
+
+    def test_csv_quotes_awkward_texts(self):
+        content = ''.join(csv_lines([(1, 'plain'), (1, 'comma, "quote"\nnewline')]))
+        self.assertEqual(
+            list(read_csv(io.StringIO(content, newline=''))),
+            [('1', 'plain'), ('1', 'comma, "quote"\nnewline')]
+        )
+
+    def test_jsonl_writes_a_record_per_line(self):
+        content = ''.join(jsonl_lines([(1, 'a'), (2, 'b\nc')]))
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [{'list': 1, 'item': 'a'}, {'list': 2, 'item': 'b\nc'}]
+        )
+
+class ReadTest(TestCase):
+
+    def test_csv_without_header_marks_first_row_invalid(self):
+        self.assertEqual(
+            list(read_csv(['1,a\r\n', '1,b\r\n', '1\r\n'])), [None, ('1', 'b'), None]
+        )
+
+    def test_empty_csv_has_no_rows(self):
+        self.assertEqual(list(read_csv([])), [])
+
+    def test_jsonl_marks_unparseable_lines_invalid(self):
+        lines = ['{"list": 1, "item": "a"}\n', '\n', 'nonsense\n',
+                 '{"list": 1}\n', '{"list": 1, "item": 2}\n']
+        self.assertEqual(list(read_jsonl(lines)), [('1', 'a'), None, None, None])
+
+class ImportTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+
+    def lists(self):
+        return [
+            (list_.name, [item.text for item in list_.item_set.all()])
+            for list_ in List.objects.filter(owner=self.user).order_by('id')
+        ]
+
+    def test_creates_a_list_per_key(self):
+        result = import_rows(self.user, [
+            ('7', 'buy milk'), ('9', 'call mum'), ('7', 'buy eggs'),
+        ])
+        self.assertEqual(result, ImportResult(
+            lists=2, added=3, duplicates=0, empty=0, invalid=0
+        ))
+        self.assertEqual(self.lists(), [
+            ('buy milk', ['buy milk', 'buy eggs']), ('call mum', ['call mum']),
+        ])
+
+    def test_skips_duplicate_and_empty_items(self):
+        rows = [('1', ''), ('1', 'a'), ('1', 'b'), ('1', 'a'), ('2', ''), None,
+                ('1', 'b'), ('1', ''), ('1', 'c')]
+        result = import_rows(self.user, rows, batch_size=4)
+        self.assertEqual(result, ImportResult(
+            lists=1, added=3, duplicates=2, empty=3, invalid=1
+        ))
+        self.assertEqual(self.lists(), [('a', ['a', 'b', 'c'])])
+
+    def test_lists_continue_across_batches(self):
+        rows = [('1', 'item %d' % (i,)) for i in range(10)]
+        result = import_rows(self.user, rows, batch_size=3)
+        self.assertEqual(result.lists, 1)
+        self.assertEqual(self.lists(), [('item 0', [text for _, text in rows])])
+
+    def test_batches_inserts_for_new_lists(self):
+        rows = [('%d' % (i % 5,), 'item %d' % (i,)) for i in range(50)]
+        with patch('lists.models.List.add_items') as mock_add_items:
+            import_rows(self.user, rows, batch_size=50)
+        self.assertFalse(mock_add_items.called)
+        self.assertEqual(List.objects.count(), 5)
+
+    def test_rows_that_fail_to_read_leave_nothing_imported(self):
+        def rows():
+            for i in range(10):
+                yield '1', 'item %d' % (i,)
+            raise ValueError('unreadable')
+        with self.assertRaises(ValueError):
+            import_rows(self.user, rows(), batch_size=3)
+        self.assertEqual(List.objects.count(), 0)
+
+    def test_exported_lists_import_as_copies(self):
+        first = List.create_new('buy milk', owner=self.user)
+        first.add_items(['buy eggs', 'buy bread'])
+        List.create_new('call mum', owner=self.user)
+        other = User.objects.create(email='c@d.com')
+        content = ''.join(csv_lines(export_rows(self.user)))
+        import_rows(other, read_csv(io.StringIO(content, newline='')))
+        self.assertEqual(
+            [(list_.name, [item.text for item in list_.item_set.all()])
+             for list_ in List.objects.filter(owner=other).order_by('id')],
+            self.lists()
+        )
@@ -1,19 +1,27 @@
+import html
+import json
+import re
 from unittest import skip
 from unittest.mock import Mock, patch
 
+from django.conf import settings
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.http import HttpRequest
 from django.template.loader import render_to_string
 from django.utils.html import escape
 from django.contrib.auth import get_user_model
 
 from lists.views import home_page, new_list, view_list
-from lists.models import Item, List
+from lists.models import BULK_BATCH_SIZE, Item, ItemToken, List
 from lists.forms import (
     DUPLICATE_ITEM_ERROR, EMPTY_LIST_ERROR,
     ExistingListItemForm, ItemForm,
 )
+from superlists.bench import logged_in_client
 
 User = get_user_model()
 
@@ -311,6 +319,314 @@ class ListViewTest(TestCase):
         response = self.client.get('/lists/%d/' % (list_.id,))
         self.assertContains(response, 'a@b.com')
 
+
+class ListConditionalGetTest(TestCase):
+
+    def get_list(self, list_, **headers):
+        return self.client.get('/lists/%d/' % (list_.id,), **headers)
+
+    def get_etag(self, list_):
+        # the first response hands out the CSRF cookie, which is part of
+        # the ETag of every later one
+        self.get_list(list_)
+        return self.get_list(list_)['ETag']
+
+    def test_GET_sets_etag_only(self):
+        list_ = List.create_new('item 1')
+        response = self.get_list(list_)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_etag_depends_on_csrf_cookie(self):
+        list_ = List.create_new('item 1')
+        etag = self.get_etag(list_)
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'another token'
+        response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_gets_304_without_touching_items(self):
+        list_ = List.create_new('item 1')
+        etag = self.get_etag(list_)
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any(
+            'lists_item' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_new_item_changes_etag(self):
+        list_ = List.create_new('item 1')
+        etag = self.get_etag(list_)
+        Item.objects.create(list=list_, text='item 2')
+        response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'item 2')
+
+    def test_editing_an_item_changes_etag(self):
+        list_ = List.create_new('item 1')
+        etag = self.get_etag(list_)
+        item = list_.item_set.get()
+        item.text = 'edited item'
+        item.save()
+        response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1: edited item')
+
+    def test_deleting_an_item_changes_etag(self):
+        list_ = List.create_new('item 1')
+        list_.add_items(['item 2'])
+        etag = self.get_etag(list_)
+        list_.item_set.get(text='item 2').delete()
+        response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'item 2')
+
+    def test_sharing_changes_etag(self):
+        owner = User.objects.create(email='a@b.com')
+        list_ = List.create_new('item 1', owner=owner)
+        etag = self.get_etag(list_)
+        sharee = User.objects.create(email='c@d.com')
+        self.client.post('/lists/%d/share' % (list_.id,), data={'email': 'c@d.com'})
+        response = self.get_list(list_, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_alone_does_not_get_304(self):
+        # it can't tell a logged in user from a logged out one
+        list_ = List.create_new('item 1')
+        response = self.get_list(
+            list_, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_POST_is_not_conditional(self):
+        list_ = List.create_new('item 1')
+        etag = self.get_etag(list_)
+        response = self.client.post(
+            '/lists/%d/' % (list_.id,),
+            data={'text': 'item 2'},
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header('ETag'))
+
+class ListFragmentCacheTest(TestCase):
+
+    def get_list_as(self, user, list_):
+        request = HttpRequest()
+        request.user = user
+        return view_list(request, list_.id)
+
+    def test_second_render_does_not_query_items_or_sharees(self):
+        owner = User.objects.create(email='a@b.com')
+        list_ = List.create_new('item 1', owner=owner)
+        list_.shared_with.add(User.objects.create(email='c@d.com'))
+        self.get_list_as(owner, list_)
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_list_as(owner, list_)
+        self.assertContains(response, '1: item 1')
+        self.assertContains(response, 'c@d.com')
+        self.assertFalse(any(
+            'lists_item' in query['sql'] or 'shared_with' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_second_render_of_a_long_list_comes_from_the_cache(self):
+        owner = User.objects.create(email='a@b.com')
+        list_ = List.create_new('item 0', owner=owner)
+        list_.add_items(['a longer to-do item, number %d' % (i,) for i in range(1, 1000)])
+        list_ = List.objects.get(id=list_.id)
+        first = self.get_list_as(owner, list_)
+        self.assertGreater(len(first.content), 32 * 1024)
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_list_as(owner, list_)
+        self.assertContains(response, '1000: a longer to-do item, number 999')
+        self.assertFalse(any(
+            'lists_item' in query['sql'] for query in context.captured_queries
+        ))
+
+    def test_new_item_shows_up_after_caching(self):
+        list_ = List.create_new('item 1')
+        self.client.get('/lists/%d/' % (list_.id,))
+        Item.objects.create(list=list_, text='item 2')
+        response = self.client.get('/lists/%d/' % (list_.id,))
+        self.assertContains(response, '2: item 2')
+
+    def test_edited_and_deleted_items_show_up_after_caching(self):
+        list_ = List.create_new('item 1')
+        list_.add_items(['item 2'])
+        self.client.get('/lists/%d/' % (list_.id,))
+        item = list_.item_set.get(text='item 1')
+        item.text = 'edited item'
+        item.save()
+        list_.item_set.get(text='item 2').delete()
+        response = self.client.get('/lists/%d/' % (list_.id,))
+        self.assertContains(response, '1: edited item')
+        self.assertNotContains(response, 'item 2')
+
+    def test_new_sharee_shows_up_after_caching(self):
+        owner = User.objects.create(email='a@b.com')
+        list_ = List.create_new('item 1', owner=owner)
+        self.get_list_as(owner, list_)
+        list_.shared_with.add(User.objects.create(email='c@d.com'))
+        list_ = List.objects.get(id=list_.id)
+        self.assertContains(self.get_list_as(owner, list_), 'c@d.com')
+
+    def test_owner_colour_stays_per_user(self):
+        owner = User.objects.create(email='a@b.com')
+        other = User.objects.create(email='c@d.com')
+        list_ = List.create_new('item 1', owner=owner)
+        self.assertContains(self.get_list_as(owner, list_), 'text-success')
+        response = self.get_list_as(other, list_)
+        self.assertContains(response, 'text-warning')
+        self.assertNotContains(response, 'text-success')
+        self.assertNotContains(response, 'List shared with')
+
+class ListItemPagesTest(TestCase):
+
+    def create_list(self, count):
+        list_ = List.create_new('item 1')
+        for i in range(2, count + 1):
+            Item.objects.create(list=list_, text='item %d' % (i,))
+        return list_
+
+    def test_stream_mode_streams_the_whole_list(self):
+        list_ = self.create_list(5)
+        with patch('lists.models.ITEMS_PAGE_SIZE', 2):
+            response = self.client.get('/lists/%d/?stream=1' % (list_.id,))
+            content = b''.join(response.streaming_content).decode()
+        self.assertTrue(response.streaming)
+        self.assertIn('id="id_list_table"', content)
+        self.assertIn('1: item 1', content)
+        self.assertIn('5: item 5', content)
+        self.assertLess(content.index('2: item 2'), content.index('3: item 3'))
+        self.assertIn('name="text"', content)
+
+    def test_stream_mode_sets_csrf_cookie(self):
+        list_ = self.create_list(1)
+        response = self.client.get('/lists/%d/?stream=1' % (list_.id,))
+        b''.join(response.streaming_content)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_after_returns_first_page_of_rows_with_next_cursor(self):
+        list_ = self.create_list(3)
+        items = list(list_.item_set.all())
+        with patch('lists.models.ITEMS_PAGE_SIZE', 2):
+            response = self.client.get('/lists/%d/?after=' % (list_.id,))
+        self.assertContains(response, '1: item 1')
+        self.assertContains(response, '2: item 2')
+        self.assertNotContains(response, 'item 3')
+        self.assertNotContains(response, 'id_list_table')
+        self.assertEqual(response['X-Next-After'], str(items[1].id))
+
+    def test_after_continues_numbering_from_cursor(self):
+        list_ = self.create_list(3)
+        items = list(list_.item_set.all())
+        with patch('lists.models.ITEMS_PAGE_SIZE', 2):
+            response = self.client.get(
+                '/lists/%d/?after=%d' % (list_.id, items[1].id)
+            )
+        self.assertContains(response, '3: item 3')
+        self.assertNotContains(response, 'item 2')
+        self.assertFalse(response.has_header('X-Next-After'))
+
+class AddItemTest(TestCase):
+
+    def post_item(self, list_, **data):
+        return self.client.post('/lists/%d/items' % (list_.id,), data=data)
+
+    def test_POST_saves_item_and_returns_its_row(self):
+        list_ = List.create_new('first')
+        response = self.post_item(list_, text='second', rows=1)
+        item = Item.objects.get(text='second')
+        self.assertEqual(item.list, list_)
+        self.assertEqual(json.loads(response.content.decode()), {
+            'id': item.id,
+            'text': 'second',
+            'row': render_to_string('list_rows.html', {
+                'items': [item], 'offset': 1
+            }),
+            'version': List.objects.get(id=list_.id).version,
+        })
+
+    def test_row_is_numbered_from_posted_row_count(self):
+        list_ = List.create_new('first')
+        response = self.post_item(list_, text='second', rows=1)
+        row = json.loads(response.content.decode())['row']
+        self.assertIn('2: second', row)
+
+    def test_row_number_is_counted_without_row_count(self):
+        list_ = List.create_new('first')
+        Item.objects.create(list=list_, text='second')
+        response = self.post_item(list_, text='third')
+        row = json.loads(response.content.decode())['row']
+        self.assertIn('3: third', row)
+
+    def test_row_text_is_escaped(self):
+        list_ = List.create_new('first')
+        response = self.post_item(list_, text='<b>bold</b>', rows=1)
+        row = json.loads(response.content.decode())['row']
+        self.assertIn(escape('<b>bold</b>'), row)
+
+    def test_does_not_render_the_list(self):
+        list_ = List.create_new('first')
+        for i in range(20):
+            Item.objects.create(list=list_, text='item %d' % (i,))
+        # list, duplicate check, savepoint, insert, version bump, release
+        with self.assertNumQueries(6):
+            self.post_item(list_, text='new', rows=21)
+
+    def test_empty_item_returns_400_with_error(self):
+        list_ = List.create_new('first')
+        response = self.post_item(list_, text='')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content.decode()),
+            {'errors': [EMPTY_LIST_ERROR]}
+        )
+        self.assertEqual(list_.item_set.count(), 1)
+
+    def test_duplicate_item_returns_400_with_error(self):
+        list_ = List.create_new('first')
+        response = self.post_item(list_, text='first')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content.decode()),
+            {'errors': [DUPLICATE_ITEM_ERROR]}
+        )
+        self.assertEqual(list_.item_set.count(), 1)
+
+    def test_GET_is_not_allowed(self):
+        list_ = List.create_new('first')
+        response = self.client.get('/lists/%d/items' % (list_.id,))
+        self.assertEqual(response.status_code, 405)
+
+    def test_list_page_points_form_at_add_item_url(self):
+        list_ = List.create_new('first')
+        response = self.client.get('/lists/%d/' % (list_.id,))
+        self.assertContains(
+            response, 'data-items-url="/lists/%d/items"' % (list_.id,)
+        )
+
+class BulkAddItemsTest(TestCase):
+
+    def test_POST_adds_items_and_reports_rejections(self):
+        list_ = List.create_new('existing')
+        response = self.client.post(
+            '/lists/%d/items/bulk' % (list_.id,),
+            data={'text': ['a', 'existing', '', 'b', 'a']}
+        )
+        self.assertEqual(json.loads(response.content.decode()), {
+            'added': ['a', 'b'],
+            'duplicates': ['existing', 'a'],
+            'empty': [2],
+        })
+        self.assertEqual(list_.item_set.count(), 3)
+
+    def test_GET_is_not_allowed(self):
+        list_ = List.create_new('existing')
+        response = self.client.get('/lists/%d/items/bulk' % (list_.id,))
+        self.assertEqual(response.status_code, 405)
+
 class HomePageTest(TestCase):
 
     def test_home_page_renders_home_template(self):
@@ -333,6 +649,73 @@ class MyListsTest(TestCase):
         response = self.client.get('/lists/users/a@b.com/')
         self.assertEqual(response.context['owner'], correct_user)
 
+    def create_lists_for(self, user, count):
+        start = List.objects.count()
+        for i in range(start, start + count):
+            List.create_new('owned %d' % (i,), owner=user)
+            other = User.objects.create(email='other%d@b.com' % (i,))
+            List.create_new('shared %d' % (i,), owner=other).shared_with.add(user)
+
+    def test_displays_names_of_owned_and_shared_lists(self):
+        user = User.objects.create(email='a@b.com')
+        self.create_lists_for(user, 2)
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertContains(response, 'owned 1')
+        self.assertContains(response, 'shared 1')
+
+    def test_query_count_does_not_depend_on_number_of_lists(self):
+        user = User.objects.create(email='a@b.com')
+        self.create_lists_for(user, 1)
+        with self.assertNumQueries(3):
+            self.client.get('/lists/users/a@b.com/')
+        self.create_lists_for(user, 10)
+        with self.assertNumQueries(3):
+            self.client.get('/lists/users/a@b.com/')
+
+    def test_unknown_owner_runs_no_list_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/lists/users/nobody@b.com/')
+        self.assertEqual(list(response.context['owned_lists']), [])
+
+    @patch('lists.models.LISTS_PAGE_SIZE', 2)
+    def test_owned_and_shared_lists_are_paginated_by_id(self):
+        user = User.objects.create(email='a@b.com')
+        self.create_lists_for(user, 3)
+        owned = List.objects.filter(owner=user).order_by('id')
+        shared = List.objects.filter(shared_with=user).order_by('id')
+
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertEqual(response.context['owned_lists'], list(owned[:2]))
+        self.assertEqual(response.context['next_owned'], owned[1].id)
+        self.assertEqual(response.context['next_shared'], shared[1].id)
+
+        response = self.client.get(
+            '/lists/users/a@b.com/?owned_after=%d' % (owned[1].id,)
+        )
+        self.assertEqual(response.context['owned_lists'], [owned[2]])
+        self.assertIsNone(response.context['next_owned'])
+        self.assertEqual(response.context['shared_lists'], list(shared[:2]))
+
+    @patch('lists.models.LISTS_PAGE_SIZE', 2)
+    def test_paging_one_section_keeps_the_other_on_its_page(self):
+        user = User.objects.create(email='a@b.com')
+        self.create_lists_for(user, 5)
+        owned = List.objects.filter(owner=user).order_by('id')
+        shared = List.objects.filter(shared_with=user).order_by('id')
+
+        def follow(response, link_id):
+            href = re.search(r'id="%s" href="([^"]*)"' % (link_id,),
+                             response.content.decode()).group(1)
+            return self.client.get('/lists/users/a@b.com/' + html.unescape(href))
+
+        response = follow(self.client.get('/lists/users/a@b.com/'), 'id_more_owned')
+        response = follow(response, 'id_more_shared')
+        self.assertEqual(response.context['owned_lists'], list(owned[2:4]))
+        self.assertEqual(response.context['shared_lists'], list(shared[2:4]))
+        response = follow(response, 'id_more_owned')
+        self.assertEqual(response.context['owned_lists'], [owned[4]])
+        self.assertEqual(response.context['shared_lists'], list(shared[2:4]))
+
 class ShareListTest(TestCase):
 
     def test_post_redirects_to_lists_page(self):
@@ -354,4 +737,147 @@ class ShareListTest(TestCase):
         self.assertIn(
             sharee,
             list_.shared_with.all()
-        )
\ No newline at end of file
+        )
+
+    @patch('lists.views.logger')
+    def test_unknown_sharee_is_logged_not_shared(self, mock_logger):
+        list_ = List.objects.create()
+        response = self.client.post(
+            '/lists/%d/share' % list_.id,
+            data={'email': 'nobody@b.com'}
+        )
+        self.assertRedirects(response, '/lists/%d/' % list_.id)
+        self.assertEqual(list_.shared_with.count(), 0)
+        mock_logger.warning.assert_called_once_with(
+            'sharee not found: %s', 'nobody@b.com'
+        )
+
+class SearchViewTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+        self.client = logged_in_client(self.user)
+
+    def test_renders_search_template(self):
+        response = self.client.get('/lists/search')
+        self.assertTemplateUsed(response, 'search.html')
+        self.assertNotContains(response, 'id_search_results')
+
+    def test_shows_matching_items_with_their_lists(self):
+        list_ = List.create_new('shopping', owner=self.user)
+        list_.add_items(['buy milk'])
+        ItemToken.catch_up()
+        response = self.client.get('/lists/search', {'q': 'milk'})
+        self.assertContains(response, 'buy milk')
+        self.assertContains(response, list_.get_absolute_url())
+
+    def test_says_when_nothing_matches(self):
+        response = self.client.get('/lists/search', {'q': 'milk'})
+        self.assertContains(response, 'No items found')
+
+    def test_anonymous_users_find_nothing(self):
+        List.create_new('buy milk')
+        response = self.client_class().get('/lists/search', {'q': 'milk'})
+        self.assertEqual(response.context['items'], [])
+
+    @patch('lists.models.SEARCH_PAGE_SIZE', 2)
+    def test_links_to_next_page(self):
+        list_ = List.create_new('milk 1', owner=self.user)
+        list_.add_items(['milk 2', 'milk 3'])
+        ItemToken.catch_up()
+        response = self.client.get('/lists/search', {'q': 'milk'})
+        self.assertEqual(response.context['next_page'], 2)
+        self.assertContains(response, '?q=milk&amp;page=2')
+        response = self.client.get('/lists/search', {'q': 'milk', 'page': 2})
+        self.assertEqual(len(response.context['items']), 1)
+        self.assertIsNone(response.context['next_page'])
+
+class ExportListsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+        self.client = logged_in_client(self.user)
+
+    def test_streams_owned_lists_as_csv(self):
+        list_ = List.create_new('buy milk', owner=self.user)
+        response = self.client.get('/lists/export.csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            'list,item\r\n%d,buy milk\r\n' % (list_.id,)
+        )
+
+    def test_streams_owned_lists_as_jsonl(self):
+        list_ = List.create_new('buy milk', owner=self.user)
+        response = self.client.get('/lists/export.jsonl')
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content).decode()),
+            {'list': list_.id, 'item': 'buy milk'}
+        )
+
+    def test_anonymous_users_are_forbidden(self):
+        response = self.client_class().get('/lists/export.csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_my_lists_links_to_exports_for_its_owner_only(self):
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertContains(response, '/lists/export.csv')
+        User.objects.create(email='c@d.com')
+        response = self.client.get('/lists/users/c@d.com/')
+        self.assertNotContains(response, '/lists/export.csv')
+
+class ImportListsTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='a@b.com')
+        self.client = logged_in_client(self.user)
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post('/lists/import', dict(data, file=upload))
+
+    def test_imports_csv_and_reports_counts(self):
+        # with the byte order mark spreadsheets tend to write
+        response = self.upload(
+            'lists.csv', '\ufefflist,item\r\n1,buy milk\r\n1,buy milk\r\n2,call mum\r\n'.encode()
+        )
+        self.assertEqual(json.loads(response.content.decode()), {
+            'lists': 2, 'added': 2, 'duplicates': 1, 'empty': 0, 'invalid': 0,
+        })
+        self.assertEqual(
+            sorted(List.objects.filter(owner=self.user).values_list('name', flat=True)),
+            ['buy milk', 'call mum']
+        )
+
+    def test_imports_jsonl_named_by_format_field(self):
+        response = self.upload(
+            'backup.txt', b'{"list": 1, "item": "buy milk"}\n', format='jsonl'
+        )
+        self.assertEqual(json.loads(response.content.decode())['added'], 1)
+        self.assertEqual(List.objects.get().owner, self.user)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.upload('lists.xls', b'')
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_file_is_rejected(self):
+        response = self.client.post('/lists/import')
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_utf8_file_is_rejected(self):
+        response = self.upload('lists.csv', 'list,item\r\n1,caf\xe9\r\n'.encode('latin-1'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_utf8_byte_past_the_first_batch_imports_nothing(self):
+        rows = ''.join('%d,item %d\r\n' % (i, i) for i in range(BULK_BATCH_SIZE + 10))
+        content = ('list,item\r\n' + rows).encode() + '9,caf\xe9\r\n'.encode('latin-1')
+        response = self.upload('lists.csv', content)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(List.objects.count(), 0)
+
+    def test_anonymous_users_are_forbidden(self):
+        response = self.client_class().post('/lists/import')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(List.objects.count(), 0)
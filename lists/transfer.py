@@ -0,0 +1,156 @@
+import csv
+import itertools
+import json
+from collections import namedtuple, OrderedDict
+
+from django.db import transaction
+from django.db.models import Q
+
+from lists.models import BULK_BATCH_SIZE, ITEMS_PAGE_SIZE, Item, List
+
+CSV_HEADER = ('list', 'item')
+
+# counts of rows: `invalid` ones couldn't be parsed
+ImportResult = namedtuple(
+    'ImportResult', ['lists', 'added', 'duplicates', 'empty', 'invalid']
+)
+
+def items_after(list_ids, after=None):
+    # the lists' items in (list, id) order, which the ('list', 'id') index
+    # serves, from just past the (list id, item id) pair `after`
+    items = Item.objects.only('id', 'list', 'text').filter(
+        list__in=list_ids
+    ).order_by('list_id', 'id')
+    if after is not None:
+        list_id, id_ = after
+        items = items.filter(Q(list_id__gt=list_id) | Q(list_id=list_id, id__gt=id_))
+    return items
+
+def export_rows(owner):
+    # (list id, item text) for every item in the owner's lists, read a page
+    # of lists and a page of their items at a time
+    lists = List.objects.filter(owner=owner)
+    after = None
+    while True:
+        page, after = lists.page(after)
+        ids = [list_.id for list_ in page]
+        items_page_after = None
+        while ids:
+            chunk = list(items_after(ids, items_page_after)[:ITEMS_PAGE_SIZE + 1])
+            for item in chunk[:ITEMS_PAGE_SIZE]:
+                yield item.list_id, item.text
+            if len(chunk) <= ITEMS_PAGE_SIZE:
+                break
+            last = chunk[ITEMS_PAGE_SIZE - 1]
+            items_page_after = last.list_id, last.id
+        if after is None:
+            return
+
+def _joined(lines, size=BULK_BATCH_SIZE):
+    # a response chunk per batch of rows rather than per row
+    lines = iter(lines)
+    while True:
+        chunk = ''.join(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+class _Echo(object):
+    # lets csv.writer hand back each row it formats
+    def write(self, value):
+        return value
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    return _joined(itertools.chain(
+        [writer.writerow(CSV_HEADER)], (writer.writerow(row) for row in rows)
+    ))
+
+def jsonl_lines(rows):
+    return _joined(
+        json.dumps({'list': list_id, 'item': text}) + '\n'
+        for list_id, text in rows
+    )
+
+def read_csv(lines):
+    # yields (list key, item text) pairs, or None for rows that don't parse
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    if header != list(CSV_HEADER):
+        yield None
+    for row in reader:
+        yield tuple(row) if len(row) == 2 else None
+
+def read_jsonl(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            row = str(record['list']), record['item']
+        except (ValueError, KeyError, TypeError):
+            yield None
+            continue
+        yield row if isinstance(row[1], str) else None
+
+def _new_items(list_, texts):
+    # texts for a list created in this batch, whose only item so far is
+    # its first one, so duplicates can be found without asking the database
+    seen = {list_.name}
+    added = []
+    for text in texts:
+        if text and text not in seen:
+            seen.add(text)
+            added.append(text)
+    return added
+
+def import_rows(owner, rows, batch_size=BULK_BATCH_SIZE):
+    # each distinct list key in the rows becomes a new list for the owner;
+    # the rows are read and written a batch at a time, so only the map of
+    # keys to lists grows with the upload; all in one transaction, so a
+    # row that fails to read partway through leaves nothing imported
+    with transaction.atomic():
+        return _import_batches(owner, iter(rows), batch_size)
+
+def _import_batches(owner, rows, batch_size):
+    lists = {}
+    counts = dict.fromkeys(ImportResult._fields, 0)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return ImportResult(**counts)
+        texts_by_key = OrderedDict()
+        for row in batch:
+            if row is None:
+                counts['invalid'] += 1
+            else:
+                texts_by_key.setdefault(row[0], []).append(row[1])
+
+        new = [
+            (key, next(text for text in texts if text))
+            for key, texts in texts_by_key.items()
+            if key not in lists and any(texts)
+        ]
+        created = List.create_many((text, owner) for _, text in new)
+        items = []
+        for (key, _), list_ in zip(new, created):
+            lists[key] = list_
+            texts = texts_by_key.pop(key)
+            added = _new_items(list_, texts)
+            items.extend(Item.build(list_, text) for text in added)
+            counts['added'] += 1 + len(added)
+            counts['empty'] += sum(1 for text in texts if not text)
+            counts['duplicates'] += sum(1 for text in texts if text) - 1 - len(added)
+        Item.objects.bulk_create(items, batch_size=batch_size)
+        counts['lists'] += len(created)
+
+        for key, texts in texts_by_key.items():
+            if key not in lists:
+                counts['empty'] += len(texts)
+                continue
+            result = lists[key].add_items(texts)
+            counts['added'] += len(result.added)
+            counts['duplicates'] += len(result.duplicates)
+            counts['empty'] += len(result.empty)
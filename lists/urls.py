@@ -1,12 +1,14 @@
 from django.conf.urls import patterns, include, url
 
-from django.contrib import admin
-admin.autodiscover()
-
 urlpatterns = patterns('',
     # Examples:
     url(r'^(\d+)/$', 'lists.views.view_list', name='view_list'),
     url(r'^new$', 'lists.views.new_list', name='new_list'),
+    url(r'^export\.(csv|jsonl)$', 'lists.views.export_lists', name='export_lists'),
+    url(r'^import$', 'lists.views.import_lists', name='import_lists'),
+    url(r'^search$', 'lists.views.search', name='search'),
     url(r'^users/(.+)/$', 'lists.views.my_lists', name='my_lists'),
     url(r'^(\d+)/share$', 'lists.views.share_list', name='share_list'),
+    url(r'^(\d+)/items$', 'lists.views.add_item', name='add_item'),
+    url(r'^(\d+)/items/bulk$', 'lists.views.bulk_add_items', name='bulk_add_items'),
 )
@@ -1,14 +1,34 @@
+import codecs
+import hashlib
+import logging
+import os
+import uuid
+
+from django.conf import settings
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import (
+    HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, redirect
 from django.template.loader import render_to_string
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition, require_POST
 
-from lists.models import Item, List
+from lists.models import Item, List, search_items
 from lists.forms import ItemForm, ExistingListItemForm, NewListForm
+from lists.transfer import (
+    csv_lines, export_rows, import_rows, jsonl_lines, read_csv, read_jsonl,
+)
+
+logger = logging.getLogger(__name__)
 
-User = get_user_model()
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson; charset=utf-8'),
+}
+IMPORT_READERS = {'csv': read_csv, 'jsonl': read_jsonl}
 
 # Create your views here.
 def new_list(request):
@@ -19,35 +39,190 @@ def new_list(request):
     return render(request, 'home.html', {'form': form})
 
 
+def _int_param(params, name):
+    try:
+        return int(params[name])
+    except (KeyError, ValueError):
+        return None
+
+def _list_items_page(request, list_):
+    after = _int_param(request.GET, 'after')
+    items, next_after = list_.items_page(after=after)
+    offset = 0
+    if after is not None:
+        offset = list_.item_set.filter(id__lte=after).count()
+    response = render(request, 'list_rows.html', {
+        'items': items, 'offset': offset
+    })
+    if next_after is not None:
+        response['X-Next-After'] = next_after
+    return response
+
+def _stream_list(request, list_, form):
+    # render the page around a placeholder for the item rows, then send
+    # the rows a chunk at a time so the whole list is never in memory
+    marker = uuid.uuid4().hex
+    page = render_to_string('list.html', {
+        'list': list_, 'form': form, 'items_marker': marker
+    }, request=request)
+    head, tail = page.split(marker, 1)
+    yield head
+    offset = 0
+    for items in list_.item_chunks():
+        yield render_to_string('list_rows.html', {
+            'items': items, 'offset': offset
+        })
+        offset += len(items)
+    yield tail
+
+def _list_etag(request, list_id):
+    # only GETs are answered conditionally, and only on the ETag: the page
+    # also depends on who is looking at it and their CSRF token, which a
+    # Last-Modified date can't capture
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    version = List.objects.filter(id=list_id).values_list(
+        'version', flat=True
+    ).first()
+    if version is None:
+        return None
+    user = getattr(request, 'user', None)
+    return hashlib.md5(':'.join([
+        str(list_id),
+        str(version),
+        str(getattr(user, 'pk', '')),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(),
+    ]).encode()).hexdigest()
+
+@condition(etag_func=_list_etag)
 def view_list(request, list_id):
     list_ = List.objects.get(id=list_id)
     form = ExistingListItemForm(for_list=list_)
 
     if request.method == 'POST':
         form = ExistingListItemForm(for_list=list_ ,data=request.POST)
-        if form.is_valid():
-            item = form.save()
+        if form.is_valid() and form.save() is not None:
             return redirect(list_)
+    elif 'after' in request.GET:
+        return _list_items_page(request, list_)
+    elif 'stream' in request.GET:
+        # the page's csrf_token is only rendered once the middleware has
+        # finished with the response, so ask for the cookie up front
+        get_token(request)
+        return StreamingHttpResponse(_stream_list(request, list_, form))
 
     return render(request, 'list.html', {"list": list_, "form": form})
 
+@require_POST
+def add_item(request, list_id):
+    list_ = List.objects.get(id=list_id)
+    form = ExistingListItemForm(for_list=list_, data=request.POST)
+    item = form.save() if form.is_valid() else None
+    if item is None:
+        return JsonResponse({'errors': list(form.errors['text'])}, status=400)
+    # the page posts how many rows it is showing so the new one can be
+    # numbered without counting the list
+    offset = _int_param(request.POST, 'rows')
+    if offset is None:
+        offset = list_.item_set.filter(id__lt=item.id).count()
+    row = render_to_string('list_rows.html', {
+        'items': [item], 'offset': offset
+    })
+    return JsonResponse({
+        'id': item.id,
+        'text': item.text,
+        'row': row,
+        'version': list_.version,
+    })
+
+@require_POST
+def bulk_add_items(request, list_id):
+    list_ = List.objects.get(id=list_id)
+    result = list_.add_items(request.POST.getlist('text'))
+    return JsonResponse(result._asdict())
+
 def home_page(request):
     return render(request, 'home.html', {'form': ItemForm()})
 
 def my_lists(request, email):
+    User = get_user_model()
     try:
         owner = User.objects.get(email=email)
     except User.DoesNotExist:
         owner = None
 
-    return render(request, 'my_lists.html', {'owner': owner})
+    owned_after = _int_param(request.GET, 'owned_after')
+    shared_after = _int_param(request.GET, 'shared_after')
+    owned_lists, next_owned = [], None
+    shared_lists, next_shared = [], None
+    if owner is not None:
+        owned_lists, next_owned = List.objects.filter(owner=owner).page(
+            after=owned_after
+        )
+        shared_lists, next_shared = List.objects.filter(shared_with=owner).page(
+            after=shared_after
+        )
+
+    # each section's link keeps the other section on its current page
+    return render(request, 'my_lists.html', {
+        'owner': owner,
+        'owned_lists': owned_lists,
+        'owned_after': owned_after,
+        'next_owned': next_owned,
+        'shared_lists': shared_lists,
+        'shared_after': shared_after,
+        'next_shared': next_shared,
+    })
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = max(_int_param(request.GET, 'page') or 1, 1)
+    items, next_page = [], None
+    if query and request.user.is_authenticated():
+        items, next_page = search_items(request.user, query, page)
+    return render(request, 'search.html', {
+        'query': query,
+        'items': items,
+        'page': page,
+        'next_page': next_page,
+    })
+
+def export_lists(request, format):
+    if not request.user.is_authenticated():
+        return HttpResponseForbidden()
+    lines, content_type = EXPORT_FORMATS[format]
+    response = StreamingHttpResponse(
+        lines(export_rows(request.user)), content_type=content_type
+    )
+    response['Content-Disposition'] = 'attachment; filename="lists.%s"' % (format,)
+    return response
+
+@require_POST
+def import_lists(request):
+    if not request.user.is_authenticated():
+        return HttpResponseForbidden()
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'errors': ['No file uploaded']}, status=400)
+    format = request.POST.get('format') or os.path.splitext(upload.name)[1][1:]
+    if format not in IMPORT_READERS:
+        return JsonResponse({'errors': ['Unknown format: %s' % (format,)]}, status=400)
+    # decoded a line at a time, as the rows are read
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    try:
+        result = import_rows(request.user, IMPORT_READERS[format](lines))
+    except UnicodeDecodeError:
+        return JsonResponse({'errors': ['The file is not UTF-8']}, status=400)
+    return JsonResponse(result._asdict())
 
 def share_list(request, list_id):
+    User = get_user_model()
     list_ = List.objects.get(id=list_id)
     try:
         sharee = User.objects.get(email=request.POST['email'])
         list_.shared_with.add(sharee)
     except User.DoesNotExist:
-        print("sharee not found:" + request.POST['email'])
+        logger.warning('sharee not found: %s', request.POST['email'])
 
     return redirect(list_)
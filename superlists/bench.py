@@ -0,0 +1,94 @@
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from superlists.cache import isolated_caches
+from superlists.timing import measure
+
+def percentile(sorted_values, fraction):
+    # nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(timings):
+    # timings are in seconds, the summary in milliseconds
+    timings = sorted(timings)
+    return {
+        'count': len(timings),
+        'mean_ms': round(1000 * sum(timings) / max(len(timings), 1), 3),
+        'p50_ms': round(1000 * percentile(timings, 0.50), 3),
+        'p95_ms': round(1000 * percentile(timings, 0.95), 3),
+        'p99_ms': round(1000 * percentile(timings, 0.99), 3),
+    }
+
+def time_calls(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def profile_calls(func, repeat):
+    # like time_calls, but also counts the queries each call makes and
+    # the time they take, as timed around the cursor calls
+    timings, queries, sql_time = [], 0, 0.0
+    for _ in range(repeat):
+        with measure() as measured:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        queries += measured.queries
+        sql_time += measured.sql_time
+    summary = summarize(timings)
+    summary['queries'] = round(queries / max(repeat, 1), 2)
+    summary['sql_ms'] = round(1000 * sql_time / max(repeat, 1), 3)
+    return summary
+
+def logged_in_client(user):
+    client = Client()
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    session = SessionStore()
+    session[SESSION_KEY] = user.pk
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+@contextmanager
+def throwaway_database():
+    # benchmarks seed their own data into a fresh test database so they
+    # never touch the real one
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+@contextmanager
+def throwaway_caches():
+    # and their own cache files, so they never read or clear the site's
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(CACHES=isolated_caches(settings.CACHES, directory)):
+            yield
+
+def write_report(stdout, results, as_json=False):
+    # results map a benchmark name to a dict of numbers
+    if as_json:
+        stdout.write(json.dumps(results, indent=2, sort_keys=True))
+        return
+    for name in sorted(results):
+        stdout.write('%-24s %s' % (name, '  '.join(
+            '%s=%s' % (key, value) for key, value in sorted(results[name].items())
+        )))
@@ -0,0 +1,226 @@
+import copy
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+MAGIC = b'SLCACHE1'
+# magic, buckets, ways, slot size
+FILE_HEADER = struct.Struct('<8sIII')
+# key hash, expiry time (0 for never), last use time, key length, value length
+SLOT_HEADER = struct.Struct('<QddII')
+THREAD_LOCK_STRIPES = 64
+
+def isolated_caches(caches, directory):
+    # the same CACHES with every MmapCache file moved into `directory`, for
+    # tests and benchmarks, which mustn't read or clear the site's caches
+    caches = copy.deepcopy(caches)
+    for alias, config in caches.items():
+        if config['BACKEND'] == 'superlists.cache.MmapCache':
+            config['LOCATION'] = os.path.join(directory, alias + '.cache')
+    return caches
+
+class MmapCache(BaseCache):
+    # a fixed-size hash table in a file that every process on the host maps:
+    # keys hash to a bucket of WAYS slots, the least recently used slot in a
+    # full bucket is overwritten, and values too big for a slot aren't
+    # cached. Buckets are locked with fcntl byte-range locks across
+    # processes, and thread locks within one
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.buckets = int(options.get('BUCKETS', 512))
+        self.ways = int(options.get('WAYS', 4))
+        self.slot_size = int(options.get('SLOT_SIZE', 16384))
+        # a file per layout, so processes started with other options (say,
+        # midway through a deploy) never resize a file that is mapped
+        self.path = '%s.%dx%dx%d' % (location, self.buckets, self.ways, self.slot_size)
+        self.size = FILE_HEADER.size + self.buckets * self.ways * self.slot_size
+        self._fd = None
+        self._map = None
+        self._open_lock = threading.Lock()
+        self._thread_locks = [threading.Lock() for _ in range(THREAD_LOCK_STRIPES)]
+
+    def _open(self):
+        with self._open_lock:
+            if self._map is not None:
+                return
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
+            header = FILE_HEADER.pack(MAGIC, self.buckets, self.ways, self.slot_size)
+            while True:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                try:
+                    if os.stat(self.path).st_ino != os.fstat(fd).st_ino:
+                        # replaced while we waited for the lock
+                        continue
+                    size = os.fstat(fd).st_size
+                    if size == 0:
+                        # new, and only mapped once it has a header
+                        os.ftruncate(fd, self.size)
+                        os.pwrite(fd, header, 0)
+                    elif size != self.size or os.pread(fd, FILE_HEADER.size, 0) != header:
+                        # not a file we can use; others may have it mapped,
+                        # so put a new one in its place rather than resize it
+                        self._replace(header)
+                        continue
+                    self._map = mmap.mmap(fd, self.size)
+                    self._fd, fd = fd, None
+                    return
+                finally:
+                    if fd is not None:
+                        fcntl.lockf(fd, fcntl.LOCK_UN)
+                        os.close(fd)
+                    else:
+                        fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def _replace(self, header):
+        fd, path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.')
+        try:
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, header, 0)
+        finally:
+            os.close(fd)
+        os.chmod(path, 0o600)
+        os.replace(path, self.path)
+
+    def _slot_offset(self, bucket, way):
+        return FILE_HEADER.size + (bucket * self.ways + way) * self.slot_size
+
+    @contextmanager
+    def _locked(self, bucket):
+        if self._map is None:
+            self._open()
+        offset = self._slot_offset(bucket, 0)
+        with self._thread_locks[bucket % THREAD_LOCK_STRIPES]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    def _hash(self, key):
+        key_bytes = key.encode()
+        key_hash = struct.unpack('<Q', hashlib.md5(key_bytes).digest()[:8])[0]
+        return key_bytes, key_hash, key_hash % self.buckets
+
+    def _read_header(self, offset):
+        return SLOT_HEADER.unpack_from(self._map, offset)
+
+    def _find(self, bucket, key_bytes, key_hash, now):
+        # returns (way holding the live key or None, way to write it to)
+        free = None
+        oldest, oldest_use = 0, None
+        for way in range(self.ways):
+            offset = self._slot_offset(bucket, way)
+            slot_hash, expiry, last_use, key_len, value_len = self._read_header(offset)
+            if key_len == 0:
+                free = way if free is None else free
+                continue
+            if expiry and expiry <= now:
+                self._clear_slot(offset)
+                free = way if free is None else free
+                continue
+            start = offset + SLOT_HEADER.size
+            if (slot_hash == key_hash and key_len == len(key_bytes) and
+                    self._map[start:start + key_len] == key_bytes):
+                return way, way
+            if oldest_use is None or last_use < oldest_use:
+                oldest, oldest_use = way, last_use
+        return None, free if free is not None else oldest
+
+    def _clear_slot(self, offset):
+        SLOT_HEADER.pack_into(self._map, offset, 0, 0.0, 0.0, 0, 0)
+
+    def _write(self, bucket, way, key_bytes, key_hash, payload, expiry, now):
+        offset = self._slot_offset(bucket, way)
+        start = offset + SLOT_HEADER.size
+        self._map[start:start + len(key_bytes)] = key_bytes
+        start += len(key_bytes)
+        self._map[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(
+            self._map, offset,
+            key_hash, expiry, now, len(key_bytes), len(payload)
+        )
+
+    def _set(self, key, value, timeout, version, only_if_missing):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        key_bytes, key_hash, bucket = self._hash(key)
+        expiry = self.get_backend_timeout(timeout)
+        now = time.time()
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        fits = SLOT_HEADER.size + len(key_bytes) + len(payload) <= self.slot_size
+        with self._locked(bucket):
+            found, way = self._find(bucket, key_bytes, key_hash, now)
+            if found is not None and only_if_missing:
+                return False
+            if not fits or (expiry is not None and expiry <= now):
+                if found is not None:
+                    self._clear_slot(self._slot_offset(bucket, found))
+                return False
+            self._write(bucket, way, key_bytes, key_hash, payload, expiry or 0.0, now)
+            return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._set(key, value, timeout, version, only_if_missing=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set(key, value, timeout, version, only_if_missing=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        key_bytes, key_hash, bucket = self._hash(key)
+        now = time.time()
+        with self._locked(bucket):
+            found, _ = self._find(bucket, key_bytes, key_hash, now)
+            if found is None:
+                return default
+            offset = self._slot_offset(bucket, found)
+            header = self._read_header(offset)
+            SLOT_HEADER.pack_into(self._map, offset, *(header[:2] + (now,) + header[3:]))
+            start = offset + SLOT_HEADER.size + header[3]
+            payload = self._map[start:start + header[4]]
+        return pickle.loads(payload)
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        key_bytes, key_hash, bucket = self._hash(key)
+        with self._locked(bucket):
+            found, _ = self._find(bucket, key_bytes, key_hash, time.time())
+            if found is not None:
+                self._clear_slot(self._slot_offset(bucket, found))
+
+    def has_key(self, key, version=None):
+        marker = object()
+        return self.get(key, marker, version=version) is not marker
+
+    def clear(self):
+        if self._map is None:
+            self._open()
+        for lock in self._thread_locks:
+            lock.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for bucket in range(self.buckets):
+                    for way in range(self.ways):
+                        self._clear_slot(self._slot_offset(bucket, way))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        finally:
+            for lock in self._thread_locks:
+                lock.release()
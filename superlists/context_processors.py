@@ -0,0 +1,14 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+def static_bundles(request):
+    # the bundled files when the storage builds bundles, their sources
+    # otherwise
+    bundled = getattr(staticfiles_storage, 'bundled', False)
+    files = {'.js': [], '.css': []}
+    for bundle, sources in sorted(settings.STATIC_BUNDLES.items()):
+        extension = os.path.splitext(bundle)[1]
+        files[extension].extend([bundle] if bundled else sources)
+    return {'static_js': files['.js'], 'static_css': files['.css']}
@@ -0,0 +1,137 @@
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler
+
+from django.utils.module_loading import import_string
+
+_STOP = object()
+
+def write_batch(handler, records):
+    records = [
+        record for record in records
+        if record.levelno >= handler.level and handler.filter(record)
+    ]
+    if not records:
+        return
+    if not isinstance(handler, logging.StreamHandler):
+        for record in records:
+            try:
+                handler.handle(record)
+            except Exception:
+                handler.handleError(record)
+        return
+    # one write and one flush for the whole batch, instead of a flush per
+    # record as StreamHandler.emit does
+    handler.acquire()
+    try:
+        text = ''.join(handler.format(record) + handler.terminator for record in records)
+        if handler.stream is None:
+            handler.stream = handler._open()
+        handler.stream.write(text)
+        handler.flush()
+    except Exception:
+        handler.handleError(records[0])
+    finally:
+        handler.release()
+
+class QueuedHandler(QueueHandler):
+    """
+    Puts records on a bounded queue for a background thread to write to
+    `handlers` in batches, so logging never blocks the calling thread.
+
+    When the queue is full records are dropped and counted, and the
+    listener logs how many it lost.
+    """
+
+    def __init__(self, handlers, maxsize=10000, batch_size=100):
+        super().__init__(queue.Queue(maxsize))
+        self.targets = list(handlers)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._reported = 0
+        self._drop_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # a forked worker: the listener thread stayed in the parent,
+                # along with whatever was still queued
+                self.queue = queue.Queue(self.queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='queued-logging', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def close(self):
+        # logging.shutdown closes handlers at exit, which drains the queue
+        self.stop()
+        super().close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            self._report_drops(records)
+            for target in self.targets:
+                write_batch(target, records)
+            if len(records) < len(batch):
+                return
+
+    def _report_drops(self, records):
+        dropped = self.dropped
+        if dropped > self._reported:
+            records.append(logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': 'log queue full, dropped %d records' % (dropped - self._reported,),
+            }))
+            self._reported = dropped
+
+def build_handler(config):
+    # from a dictConfig-style dict of 'class', 'level' and the keyword
+    # arguments of the class
+    config = dict(config)
+    handler_class = import_string(config.pop('class'))
+    level = config.pop('level', logging.NOTSET)
+    handler = handler_class(**config)
+    handler.setLevel(level)
+    return handler
+
+def queued_handler(handlers, **options):
+    # the dictConfig factory: `handlers` are the configs of the handlers to
+    # write to, which are built here rather than found among those
+    # dictConfig has built
+    return QueuedHandler([build_handler(config) for config in handlers], **options)
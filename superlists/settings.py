@@ -25,8 +25,6 @@ SECRET_KEY = '54-ps!bxw@mh3xqz@=!bbo1%3*4xebko7=v%h1%a(ms25boxl)'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
-TEMPLATE_DEBUG = True
-
 DOMAIN = "localhost"
 
 ALLOWED_HOSTS = [DOMAIN]
@@ -43,10 +41,15 @@ INSTALLED_APPS = (
     'django.contrib.staticfiles',
     'lists',
     'accounts',
-    'functional_tests',
 )
+# functional_tests only provides the create_session command the FTs call
+# on staging, so it stays out of production's startup
+if DEBUG or os.environ.get('SUPERLISTS_FUNCTIONAL_TESTS'):
+    INSTALLED_APPS += ('functional_tests',)
 
 MIDDLEWARE_CLASSES = (
+    # first, so its timings cover the rest of the stack
+    'superlists.timing.TimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,11 +58,47 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+# 'db', 'cached_db' (cache in front of the database, writing through to it)
+# or 'signed_cookies' (no server-side storage at all)
+SESSION_MODE = os.environ.get('SUPERLISTS_SESSION_MODE', 'db')
+assert SESSION_MODE in ('db', 'cached_db', 'signed_cookies'), \
+    'SUPERLISTS_SESSION_MODE must be db, cached_db or signed_cookies'
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + SESSION_MODE
+
 AUTH_USER_MODEL = 'accounts.User'
 AUTHENTICATION_BACKENDS = (
     'accounts.authentication.PersonaAuthenticationBackend',
 )
 
+# the Django engine, timing each render for TimingMiddleware; template
+# debugging follows DEBUG
+template_loaders = [
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # compile each template once per process; superlists.wsgi compiles
+    # them all at boot, before gunicorn forks its workers
+    template_loaders = [('django.template.loaders.cached.Loader', template_loaders)]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'superlists.timing.TimedDjangoTemplates',
+        'OPTIONS': {
+            'loaders': template_loaders,
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.template.context_processors.debug',
+                'django.template.context_processors.i18n',
+                'django.template.context_processors.media',
+                'django.template.context_processors.static',
+                'django.template.context_processors.tz',
+                'django.contrib.messages.context_processors.messages',
+                'superlists.context_processors.static_bundles',
+            ],
+        },
+    },
+]
+
 ROOT_URLCONF = 'superlists.urls'
 
 WSGI_APPLICATION = 'superlists.wsgi.application'
@@ -78,6 +117,26 @@ DATABASES = {
     }
 }
 
+# Cache shared by all the gunicorn workers on a host through a memory-mapped
+# file, so hot fragments, users and sessions survive worker respawns
+CACHES = {
+    'default': {
+        'BACKEND': 'superlists.cache.MmapCache',
+        'LOCATION': os.path.join(BASE_DIR, '../cache/superlists.cache'),
+    },
+    # rendered page fragments, such as every row of a long list, need far
+    # bigger slots than the default cache's 16 KB; the file is sparse, so
+    # only slots in use take memory
+    'fragments': {
+        'BACKEND': 'superlists.cache.MmapCache',
+        'LOCATION': os.path.join(BASE_DIR, '../cache/superlists-fragments.cache'),
+        'OPTIONS': {'BUCKETS': 128, 'WAYS': 4, 'SLOT_SIZE': 256 * 1024},
+    },
+}
+USER_CACHE_ALIAS = 'default'
+
+TEST_RUNNER = 'superlists.test_runner.TestRunner'
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
@@ -101,18 +160,39 @@ STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'superlists', 'static'),
 )
 
+# our own JS and CSS, each concatenated and minified into one file when
+# collected for a deploy; pages link the sources separately under DEBUG
+STATIC_BUNDLES = {
+    'bundles/superlists.js': ('list.js', 'accounts.js'),
+    'bundles/superlists.css': ('base.css',),
+}
+if not DEBUG:
+    # content-hashed names, the bundles above and .gz siblings for nginx
+    STATICFILES_STORAGE = 'superlists.storage.BundledStaticFilesStorage'
+
+CONSOLE_LOG = {
+    'level': 'DEBUG',
+    'class': 'logging.StreamHandler',
+}
+FILE_LOG = {
+    'level': 'DEBUG',
+    'class': 'logging.FileHandler',
+    'filename': os.path.join(BASE_DIR, '../logging'),
+}
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
+        'console': CONSOLE_LOG,
+        # request threads only enqueue; a background thread writes to
+        # handlers built from these configs
+        'queued': {
+            '()': 'superlists.log.queued_handler',
+            'handlers': [CONSOLE_LOG, FILE_LOG],
         },
-        'file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, '../logging'),
+        'queued_console': {
+            '()': 'superlists.log.queued_handler',
+            'handlers': [CONSOLE_LOG],
         },
     },
     'loggers': {
@@ -120,10 +200,10 @@ LOGGING = {
             'handlers': ['console'],
         },
         'accounts':{
-            'handlers': ['console'],
+            'handlers': ['queued_console'],
         },
         'lists': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queued'],
         },
     },
     'root': {'level': 'INFO'},
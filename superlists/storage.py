@@ -0,0 +1,98 @@
+import gzip
+import io
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+GZIP_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.map', '.eot', '.ttf')
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s+')
+CSS_PUNCTUATION_SPACE = re.compile(r'\s*([{};,>])\s*')
+
+def minify_css(source):
+    source = CSS_COMMENT.sub('', source)
+    source = CSS_SPACE.sub(' ', source)
+    source = CSS_PUNCTUATION_SPACE.sub(r'\1', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+def minify_js(source):
+    # deliberately conservative, since there is no parser here to tell a
+    # comment from a string: drops indentation, blank lines and lines that
+    # are nothing but a comment, keeping any code after a comment closes
+    lines, in_comment = [], False
+    for line in source.splitlines():
+        line = line.strip()
+        if in_comment:
+            if '*/' not in line:
+                continue
+            line = line.split('*/', 1)[1].strip()
+            in_comment = False
+        while line.startswith('/*'):
+            if '*/' not in line[2:]:
+                line, in_comment = '', True
+                break
+            line = line[2:].split('*/', 1)[1].strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def gzip_bytes(content):
+    # a fixed mtime, so the same file always compresses to the same bytes
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+class BundledStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Builds the bundles in settings.STATIC_BUNDLES out of the collected
+    files, then has ManifestStaticFilesStorage give everything
+    content-hashed names, then writes a .gz next to each hashed text file
+    for nginx's gzip_static.
+    """
+
+    bundled = True
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for bundle, sources in settings.STATIC_BUNDLES.items():
+            self.build_bundle(bundle, sources)
+            paths[bundle] = (self, bundle)
+
+        hashed_names = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+
+        for hashed_name in hashed_names:
+            # a hashed name's content never changes, so neither does its .gz
+            if hashed_name.endswith(GZIP_EXTENSIONS) and not self.exists(hashed_name + '.gz'):
+                self.write_gzip(hashed_name)
+
+    def build_bundle(self, bundle, sources):
+        minify = MINIFIERS[os.path.splitext(bundle)[1]]
+        parts = []
+        for source in sources:
+            with self.open(source) as f:
+                parts.append(minify(f.read().decode('utf-8')))
+        self.replace(bundle, ''.join(parts).encode('utf-8'))
+
+    def write_gzip(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        compressed = gzip_bytes(content)
+        if len(compressed) < len(content):
+            self.replace(name + '.gz', compressed)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
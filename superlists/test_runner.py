@@ -0,0 +1,24 @@
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from superlists.cache import isolated_caches
+
+class TestRunner(DiscoverRunner):
+    # the tests clear the caches, so they get their own cache files in a
+    # temporary directory rather than the site's
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.caches = override_settings(
+            CACHES=isolated_caches(settings.CACHES, self.cache_directory.name)
+        )
+        self.caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,21 @@
+from collections import deque
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from lists.models import List
+from superlists.bench import profile_calls
+
+class ProfileCallsTest(TestCase):
+
+    def test_counts_queries_once_the_query_log_is_full(self):
+        full_log = deque(['earlier query'] * 5, maxlen=5)
+        with patch.object(connection, 'queries_log', full_log):
+            summary = profile_calls(lambda: List.objects.count(), 3)
+        self.assertEqual(summary['queries'], 1)
+
+    def test_times_queries_below_a_millisecond(self):
+        summary = profile_calls(lambda: List.objects.count(), 3)
+        self.assertGreater(summary['sql_ms'], 0)
+        self.assertLess(summary['sql_ms'], summary['mean_ms'])
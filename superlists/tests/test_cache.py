@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from superlists.cache import MmapCache
+
+class MmapCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.cache')
+        self.cache = self.open_cache()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_cache(self, **options):
+        options.setdefault('BUCKETS', 4)
+        options.setdefault('WAYS', 2)
+        options.setdefault('SLOT_SIZE', 256)
+        return MmapCache(self.path, {'OPTIONS': options})
+
+    def test_set_and_get(self):
+        self.cache.set('key', {'a': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'a': [1, 2]})
+
+    def test_get_missing_returns_default(self):
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_set_replaces_value(self):
+        self.cache.set('key', 'one')
+        self.cache.set('key', 'two')
+        self.assertEqual(self.cache.get('key'), 'two')
+
+    def test_add_only_sets_missing_keys(self):
+        self.assertTrue(self.cache.add('key', 'one'))
+        self.assertFalse(self.cache.add('key', 'two'))
+        self.assertEqual(self.cache.get('key'), 'one')
+
+    def test_delete(self):
+        self.cache.set('key', 'value')
+        self.cache.delete('key')
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_clear(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_entries_expire(self):
+        self.cache.set('key', 'value', timeout=0.05)
+        self.assertEqual(self.cache.get('key'), 'value')
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_values_too_big_for_a_slot_are_not_cached(self):
+        self.cache.set('key', 'small')
+        self.cache.set('key', 'x' * 1000)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_evicts_least_recently_used_in_bucket(self):
+        cache = self.open_cache(BUCKETS=1, WAYS=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_are_shared_between_instances(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(self.open_cache().get('key'), 'value')
+
+    def test_entries_are_shared_with_child_process(self):
+        self.cache.set('key', 'from parent')
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if self.open_cache().get('key') == 'from parent' else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+
+    def test_other_layouts_use_their_own_file(self):
+        self.cache.set('key', 'value')
+        cache = self.open_cache(BUCKETS=8)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', 'new')
+        self.assertEqual(cache.get('key'), 'new')
+        self.assertNotEqual(cache.path, self.cache.path)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_unusable_file_is_replaced_not_resized(self):
+        self.cache.set('key', 'value')
+        inode = os.stat(self.cache.path).st_ino
+        with open(self.cache.path, 'r+b') as f:
+            f.write(b'garbage!')
+        cache = self.open_cache()
+        self.assertIsNone(cache.get('key'))
+        self.assertNotEqual(os.stat(self.cache.path).st_ino, inode)
+        # the old mapping is still whole
+        self.assertEqual(self.cache.get('key'), 'value')
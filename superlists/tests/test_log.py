@@ -0,0 +1,107 @@
+import logging
+import threading
+
+from django.test import SimpleTestCase
+
+from superlists.log import QueuedHandler, queued_handler
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self, gate=None):
+        super().__init__()
+        self.records = []
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.records.append(record)
+
+class QueuedHandlerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('superlists.tests.queued')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def attach(self, handler):
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_records_reach_targets_once_stopped(self):
+        target = RecordingHandler()
+        handler = self.attach(QueuedHandler([target]))
+        for i in range(5):
+            self.logger.info('record %d', i)
+        handler.stop()
+        self.assertEqual(
+            [record.getMessage() for record in target.records],
+            ['record %d' % (i,) for i in range(5)]
+        )
+
+    def test_factory_builds_targets_from_their_configs(self):
+        handler = queued_handler([
+            {'class': 'logging.StreamHandler', 'level': 'WARNING'},
+            {'class': 'logging.NullHandler'},
+        ], maxsize=5)
+        self.addCleanup(handler.close)
+        stream, null = handler.targets
+        self.assertIsInstance(stream, logging.StreamHandler)
+        self.assertEqual(stream.level, logging.WARNING)
+        self.assertIsInstance(null, logging.NullHandler)
+        self.assertEqual(handler.queue.maxsize, 5)
+
+    def test_settings_queue_the_lists_log_to_console_and_file(self):
+        [handler] = logging.getLogger('lists').handlers
+        self.assertIsInstance(handler, QueuedHandler)
+        self.assertEqual(
+            [type(target) for target in handler.targets],
+            [logging.StreamHandler, logging.FileHandler]
+        )
+
+    def test_respects_target_level(self):
+        target = RecordingHandler()
+        target.setLevel(logging.WARNING)
+        handler = self.attach(QueuedHandler([target]))
+        self.logger.info('quiet')
+        self.logger.warning('loud')
+        handler.stop()
+        self.assertEqual([r.getMessage() for r in target.records], ['loud'])
+
+    def test_drops_and_reports_records_when_queue_is_full(self):
+        release = threading.Event()
+        target = RecordingHandler(release)
+        handler = self.attach(QueuedHandler([target], maxsize=2, batch_size=1))
+        for i in range(20):
+            self.logger.info('record %d', i)
+        self.assertGreater(handler.dropped, 0)
+        release.set()
+        handler.stop()
+        messages = [record.getMessage() for record in target.records]
+        self.assertEqual(len(messages), 20 - handler.dropped + 1)
+        self.assertIn(
+            'log queue full, dropped %d records' % (handler.dropped,), messages
+        )
+
+    def test_batches_stream_writes(self):
+        writes = []
+
+        class Stream(object):
+            def write(self, text):
+                writes.append(text)
+            def flush(self):
+                pass
+
+        target = logging.StreamHandler(Stream())
+        release = threading.Event()
+        blocker = RecordingHandler(release)
+        handler = self.attach(QueuedHandler([blocker, target]))
+        self.logger.info('first')
+        self.logger.info('second')
+        self.logger.info('third')
+        release.set()
+        handler.stop()
+        self.assertEqual(''.join(writes), 'first\nsecond\nthird\n')
+        self.assertLess(len(writes), 3)
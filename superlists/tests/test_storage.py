@@ -0,0 +1,95 @@
+import gzip
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from superlists.storage import minify_css, minify_js
+
+class MinifyTest(SimpleTestCase):
+
+    def test_minify_css_drops_comments_and_whitespace(self):
+        self.assertEqual(
+            minify_css('/* note */\n#a, .b > c {\n    color: red;\n}\n'),
+            '#a,.b>c{color: red}\n'
+        )
+
+    def test_minify_js_drops_indentation_and_comment_lines(self):
+        self.assertEqual(
+            minify_js(
+                '/* header\n   more */\nvar a = 1;\n\n'
+                '    // note\n    var url = "http://x";\n'
+            ),
+            'var a = 1;\nvar url = "http://x";\n'
+        )
+
+    def test_minify_js_keeps_code_after_a_one_line_comment(self):
+        self.assertEqual(
+            minify_js('/* a */ init();\n/* b */ /* c */\nvar d;\n'),
+            'init();\nvar d;\n'
+        )
+
+    def test_minify_js_keeps_code_after_a_comment_closes(self):
+        self.assertEqual(
+            minify_js('/* a\n * b\n */ foo();\n/*\n*/\nbar();\n'),
+            'foo();\nbar();\n'
+        )
+
+class BundledStorageTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        override = override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE='superlists.storage.BundledStaticFilesStorage',
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.root, 'staticfiles.json')) as f:
+            self.manifest = json.load(f)['paths']
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            return f.read()
+
+    def test_bundles_are_built_and_hashed(self):
+        bundle = self.read(self.manifest['bundles/superlists.js']).decode()
+        self.assertIn("$(document).on('submit', '#id_item_form'", bundle)
+        self.assertIn('window.Superlists', bundle)
+        self.assertLess(bundle.index('#id_text'), bundle.index('window.Superlists'))
+        css = self.read(self.manifest['bundles/superlists.css']).decode()
+        self.assertEqual(css, minify_css(self.read('base.css').decode()))
+
+    def test_hashed_text_files_get_gzipped_siblings(self):
+        for name in ('bundles/superlists.js', 'bootstrap/css/bootstrap.min.css'):
+            hashed = self.manifest[name]
+            self.assertEqual(
+                gzip.decompress(self.read(hashed + '.gz')), self.read(hashed)
+            )
+
+    def test_binary_files_are_not_gzipped(self):
+        hashed = self.manifest['bootstrap/fonts/glyphicons-halflings-regular.woff']
+        self.assertFalse(os.path.exists(os.path.join(self.root, hashed + '.gz')))
+
+    def test_pages_link_hashed_bundles(self):
+        response = self.client.get('/')
+        self.assertContains(response, '/static/' + self.manifest['bundles/superlists.js'])
+        self.assertContains(response, '/static/' + self.manifest['bundles/superlists.css'])
+        self.assertContains(
+            response, '/static/' + self.manifest['bootstrap/css/bootstrap.min.css']
+        )
+        self.assertNotContains(response, '/static/list.js')
+
+class UnbundledPagesTest(TestCase):
+
+    def test_pages_link_bundle_sources(self):
+        response = self.client.get('/')
+        for path in ('list.js', 'accounts.js', 'base.css'):
+            self.assertContains(response, '/static/' + path)
+        self.assertNotContains(response, 'bundles/')
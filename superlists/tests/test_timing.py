@@ -0,0 +1,92 @@
+import logging
+import re
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lists.models import List
+from superlists.timing import current_timings, measure
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", tpl;dur=([\d.]+), app;dur=[\d.]+$'
+)
+
+class TimingMiddlewareTest(TestCase):
+
+    def server_timing(self, response):
+        match = SERVER_TIMING.match(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        return int(match.group(1)), float(match.group(2))
+
+    def test_counts_the_queries_of_the_request(self):
+        list_ = List.create_new('first')
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/lists/%d/' % (list_.id,))
+        queries, _ = self.server_timing(response)
+        self.assertEqual(queries, len(captured))
+
+    def test_times_template_rendering(self):
+        response = self.client.get('/')
+        queries, template_ms = self.server_timing(response)
+        self.assertEqual(queries, 0)
+        self.assertGreater(template_ms, 0)
+
+    def test_redirect_renders_no_template(self):
+        response = self.client.post('/lists/new', data={'text': 'first'})
+        queries, template_ms = self.server_timing(response)
+        self.assertGreater(queries, 0)
+        self.assertEqual(template_ms, 0)
+
+    @patch('superlists.timing.logger')
+    def test_logs_timings_by_url_name(self, mock_logger):
+        list_ = List.create_new('first')
+        self.client.get('/lists/%d/' % (list_.id,))
+        extra = mock_logger.info.call_args[1]['extra']
+        self.assertEqual(extra['view'], 'view_list')
+        self.assertEqual(extra['status'], 200)
+        self.assertGreater(extra['queries'], 0)
+
+    @patch('superlists.timing.logger')
+    def test_logs_unresolved_urls(self, mock_logger):
+        self.client.get('/no/such/page/')
+        extra = mock_logger.info.call_args[1]['extra']
+        self.assertEqual(extra['view'], 'unresolved')
+        self.assertEqual(extra['status'], 404)
+
+    def test_logging_config_emits_the_timing_line(self):
+        # through the configured 'lists' logger, level and all
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        lists_logger = logging.getLogger('lists')
+        lists_logger.addHandler(handler)
+        self.addCleanup(lists_logger.removeHandler, handler)
+        self.client.get('/')
+        [record] = [r for r in records if r.getMessage().startswith('view=')]
+        self.assertEqual(record.levelno, logging.INFO)
+        self.assertEqual(record.view, 'home')
+
+    @patch('superlists.timing.logger')
+    def test_logs_nothing_when_info_is_disabled(self, mock_logger):
+        mock_logger.isEnabledFor.return_value = False
+        response = self.client.get('/')
+        self.assertFalse(mock_logger.info.called)
+        self.assertIn('Server-Timing', response)
+
+    def test_measure_includes_the_requests_made_inside_it(self):
+        list_ = List.create_new('first')
+        with measure() as timings:
+            List.objects.count()
+            response = self.client.get('/lists/%d/' % (list_.id,))
+        queries, _ = self.server_timing(response)
+        self.assertEqual(timings.queries, queries + 1)
+        self.assertGreater(timings.template_time, 0)
+        self.assertIsNone(current_timings())
+
+    def test_stops_timing_after_the_response(self):
+        self.client.get('/')
+        self.assertIsNone(current_timings())
+        List.objects.count()
+        self.assertIsNone(current_timings())
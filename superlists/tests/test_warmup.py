@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from django.template import engines
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from superlists.warmup import compile_templates, project_templates
+
+def templates_setting(loaders):
+    return [{
+        'BACKEND': 'superlists.timing.TimedDjangoTemplates',
+        'OPTIONS': {'loaders': loaders},
+    }]
+
+CACHED_LOADERS = [(
+    'django.template.loaders.cached.Loader',
+    ['django.template.loaders.app_directories.Loader'],
+)]
+
+class WarmUpTest(SimpleTestCase):
+
+    def test_finds_project_templates_only(self):
+        names = project_templates()
+        for name in ('base.html', 'home.html', 'list.html', 'list_rows.html', 'my_lists.html'):
+            self.assertIn(name, names)
+        self.assertNotIn('registration/logged_out.html', names)
+
+    @override_settings(TEMPLATES=templates_setting(CACHED_LOADERS))
+    def test_compiles_every_template_into_the_cache(self):
+        self.assertEqual(compile_templates(), {})
+        [engine] = engines.all()
+        [loader] = engine.engine.template_loaders
+        self.assertEqual(
+            sorted(loader.template_cache), sorted(project_templates())
+        )
+
+    @override_settings(TEMPLATES=templates_setting([(
+        'django.template.loaders.locmem.Loader',
+        {'fine.html': 'fine', 'broken.html': '{% if %}'},
+    )]))
+    @patch('superlists.warmup.project_templates')
+    def test_reports_templates_that_do_not_compile(self, mock_templates):
+        mock_templates.return_value = ['broken.html', 'fine.html']
+        self.assertEqual(list(compile_templates()), ['broken.html'])
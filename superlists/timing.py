@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import connections
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('lists')
+
+_local = threading.local()
+
+class Timings(object):
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        # the timings being taken when these started, which get these
+        # added to them when they finish
+        self.outer = current_timings()
+
+    def finish(self):
+        _local.timings = self.outer
+        if self.outer is not None:
+            self.outer.queries += self.queries
+            self.outer.sql_time += self.sql_time
+            self.outer.template_time += self.template_time
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+def _record_query(duration):
+    timings = current_timings()
+    if timings is not None:
+        timings.queries += 1
+        timings.sql_time += duration
+
+class TimedCursorMixin(object):
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            _record_query(time.perf_counter() - start)
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            _record_query(time.perf_counter() - start)
+
+class TimedCursorWrapper(TimedCursorMixin, CursorWrapper):
+    pass
+
+class TimedCursorDebugWrapper(TimedCursorMixin, CursorDebugWrapper):
+    pass
+
+def instrument(connection):
+    # connections are per thread, so this runs once per connection object
+    # rather than once per request
+    if getattr(connection, '_timed', False):
+        return
+    connection.make_cursor = partial(TimedCursorWrapper, db=connection)
+    connection.make_debug_cursor = partial(TimedCursorDebugWrapper, db=connection)
+    connection._timed = True
+
+@contextmanager
+def measure():
+    # times the queries and template renders of the block, including those
+    # of any requests made inside it
+    for connection in connections.all():
+        instrument(connection)
+    timings = _local.timings = Timings()
+    try:
+        yield timings
+    finally:
+        timings.finish()
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings = current_timings()
+            if timings is not None:
+                timings.template_time += time.perf_counter() - start
+
+class TimedDjangoTemplates(DjangoTemplates):
+    # only templates rendered through the backend are timed, so includes
+    # and extends are counted as part of the template that pulls them in
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code))
+
+    def get_template(self, template_name, *args, **kwargs):
+        # passes on the deprecated dirs argument only when it was given
+        return TimedTemplate(self.engine.get_template(template_name, *args, **kwargs))
+
+class TimingMiddleware(object):
+    # a streamed response's body is produced after process_response, so the
+    # queries and rendering it does are not counted
+
+    def process_request(self, request):
+        for connection in connections.all():
+            instrument(connection)
+        _local.timings = Timings()
+
+    def process_response(self, request, response):
+        timings = current_timings()
+        if timings is None:
+            return response
+        timings.finish()
+        total = time.perf_counter() - timings.start
+        match = getattr(request, 'resolver_match', None)
+        view = getattr(match, 'url_name', None) or 'unresolved'
+        response['Server-Timing'] = (
+            'db;dur=%.1f;desc="%d queries", tpl;dur=%.1f, app;dur=%.1f' % (
+                1000 * timings.sql_time, timings.queries,
+                1000 * timings.template_time, 1000 * total,
+            )
+        )
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        logger.info(
+            'view=%s status=%d queries=%d sql_ms=%.1f template_ms=%.1f total_ms=%.1f',
+            view, response.status_code, timings.queries,
+            1000 * timings.sql_time, 1000 * timings.template_time, 1000 * total,
+            extra={
+                'view': view,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'sql_ms': 1000 * timings.sql_time,
+                'template_ms': 1000 * timings.template_time,
+                'total_ms': 1000 * total,
+            }
+        )
+        return response
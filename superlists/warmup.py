@@ -0,0 +1,35 @@
+import logging
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+def project_templates():
+    # names of the templates in our own apps, not Django's
+    names = set()
+    for directory in get_app_template_dirs('templates'):
+        if not os.path.abspath(directory).startswith(os.path.abspath(settings.BASE_DIR)):
+            continue
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                names.add(os.path.relpath(os.path.join(root, filename), directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+def compile_templates():
+    # with the cached loader this leaves every template compiled for the
+    # life of the process; returns the names that failed with their errors
+    failures = {}
+    for engine in engines.all():
+        for name in project_templates():
+            try:
+                engine.get_template(name)
+            except Exception as e:
+                failures[name] = e
+    return failures
+
+def warm_up():
+    for name, error in sorted(compile_templates().items()):
+        logger.error('template %s does not compile: %s', name, error)
@@ -12,3 +12,8 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "superlists.settings")
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+# under gunicorn's preload_app this runs once in the master, and the
+# workers fork with the templates already compiled
+from superlists.warmup import warm_up
+warm_up()